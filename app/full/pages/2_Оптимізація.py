@@ -14,8 +14,10 @@ if app_root not in sys.path:
     sys.path.insert(0, app_root)
 
 from top_n_optimizer import run_top_n_ga_optimization, run_top_n_lp_optimization
-from genetic_optimizer import run_optimization, plot_progress, get_top_solutions, compute_total_ru, save_experiment_to_session
-from lp import optimize_qs_pulp
+from genetic_optimizer import solve_ga, run_pareto_optimization, plot_progress, plot_pareto_front, get_top_solutions, compute_total_ru, save_experiment_to_session, STOP_REASONS
+from utils.cache import cached_solve
+from problem import QSProblem
+from lp import optimize_qs_pulp, optimize_qs_frontier, optimize_qs_k_best, optimize_qs_batch
 
 INDICATOR_DESCRIPTIONS = {
     "AR": "Academic Reputation - Репутація в академічному середовищі",
@@ -70,6 +72,7 @@ QS_MAX = st.session_state["QS_MAX"]
 QS_DELTA = st.session_state["QS_DELTA"]
 QS_COST = st.session_state["QS_COST"]
 MAX_RU = st.session_state["MAX_RU"]
+problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
 
 st.markdown("---")
 st.subheader("📋 Поточні дані")
@@ -80,7 +83,7 @@ with col2:
     eligible_count = sum(1 for k in QS_INPUT.keys() if float(QS_DELTA.get(k, 0.0)) > 0 and float(QS_COST.get(k, 0.0)) != float("inf"))
     st.metric("Придатних показників", eligible_count)
 with col3:
-    current_qs = sum(float(QS_INPUT[k]) * float(QS_WEIGHTS[k]) for k in QS_INPUT.keys())
+    current_qs = problem.current_score
     st.metric("Поточний QS Score", f"{current_qs:.2f}")
 
 st.markdown("---")
@@ -115,8 +118,23 @@ with tab1:
             st.session_state["prev_auto_find_params"] = auto_find_params
             print(f"📊 Оновлений стан сесії prev_auto_find_params: {st.session_state['prev_auto_find_params']}")
         
+        ga_time_limit = st.number_input(
+            "⏱️ Ліміт часу, с (0 - без ліміту):",
+            min_value=0.0, value=0.0, step=1.0,
+            help="GA (разом з автопідбором параметрів) поверне найкраще рішення, знайдене за цей час",
+            key="ga_time_limit"
+        )
+
         if auto_find_params:
             n_trials = 30
+            auto_mode = st.radio(
+                "Режим автопідбору:",
+                ["adaptive", "optuna"],
+                format_func=lambda mode: {"adaptive": "🧬 Самоадаптивний GA (один запуск)", "optuna": "🔍 Пошук Optuna (повільніше)"}[mode],
+                help="Самоадаптивний GA підлаштовує мутацію, популяцію та кількість батьків під час запуску; "
+                     "Optuna перед фінальним запуском перебирає параметри у багатьох пробних запусках GA",
+                key="ga_auto_mode"
+            )
         else:
             st.markdown("**🔧 Ручне налаштування параметрів:**")
             num_generations = st.slider("Кількість поколінь:", 100, 1000, 400)
@@ -178,27 +196,39 @@ with tab1:
         print(f"📊 Параметри: бюджет={MAX_RU}, показників={len(QS_INPUT)}")
         print(f"🔍 Автоматичний пошук параметрів: {auto_find_params}")
         if auto_find_params:
-            print(f"📊 Параметри пошуку: експериментів={n_trials}")
+            print(f"📊 Параметри пошуку: режим={auto_mode}, експериментів={n_trials}")
         else:
             print(f"📊 Ручні параметри: поколінь={num_generations}, популяція={sol_per_pop}, батьки={num_parents_mating}, мутації={mutation_percent_genes}%")
         
         start_time = time.time()
         
+        # Підсумок GA (GAResult) кешується так само, як розв'язки LP
+        ga_problem = dict(QS_INPUT=QS_INPUT, QS_WEIGHTS=QS_WEIGHTS, QS_MAX=QS_MAX, QS_DELTA=QS_DELTA, QS_COST=QS_COST, MAX_RU=MAX_RU)
         if auto_find_params:
-            ga = run_optimization(
-                QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+            ga = cached_solve(
+                solve_ga,
+                algorithm="GA",
+                **ga_problem,
                 auto_find_params=True,
+                auto_mode=auto_mode,
                 n_trials=n_trials,
+                n_jobs=os.cpu_count() or 1,
+                time_limit=ga_time_limit or None,
+                checkpoint=True,
                 verbose=True
             )
         else:
-            ga = run_optimization(
-                QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+            ga = cached_solve(
+                solve_ga,
+                algorithm="GA",
+                **ga_problem,
                 auto_find_params=False,
                 num_generations=num_generations,
                 sol_per_pop=sol_per_pop,
                 num_parents_mating=num_parents_mating,
                 mutation_percent_genes=mutation_percent_genes,
+                time_limit=ga_time_limit or None,
+                checkpoint=True,
                 verbose=True
             )
         solution, qs_score, _ = ga.best_solution()
@@ -206,7 +236,7 @@ with tab1:
         print(f"✅ GA-оптимізація завершена за {elapsed_time_ga_full:.1f}с, QS Score: {qs_score:.2f}")
         result = dict(zip(QS_INPUT.keys(), solution))
 
-        total_ru = compute_total_ru(QS_INPUT, QS_COST, solution)
+        total_ru = compute_total_ru(problem, solution)
         
         experiment = save_experiment_to_session(
             algorithm="GA",
@@ -223,13 +253,16 @@ with tab1:
                 "current_qs": current_qs
             },
             QS_INPUT=QS_INPUT,
-            solution=solution
+            solution=solution,
+            telemetry=ga.telemetry
         )
         
         # Зберігаємо експеримент для AI аналізу
         st.session_state["last_ga_experiment"] = experiment
 
         st.success("✅ **Оптимізація завершена!**")
+        st.caption(f"Зупинка GA: {STOP_REASONS.get(ga.stop_reason, ga.stop_reason)} (поколінь: {ga.generations_completed}, оцінок фітнесу: {ga.num_fitness_evaluations})"
+                   + (f" - результат з кешу, GA не запускався (початковий розрахунок {ga.elapsed:.1f}с)" if ga.from_cache else ""))
         
         col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
@@ -246,12 +279,7 @@ with tab1:
             st.metric("Час обчислення", f"{elapsed_time_ga_full:.1f}с")
         
         st.subheader("📊 Детальні результати")
-        ru_spent = [
-            (float(solution[i]) - float(QS_INPUT[k])) * float(QS_COST[k])
-            if float(QS_COST[k]) != float("inf") and (float(solution[i]) - float(QS_INPUT[k])) > 0
-            else 0
-            for i, k in enumerate(QS_INPUT.keys())
-        ]
+        ru_spent = np.clip(np.asarray(solution, dtype=float) - problem.inputs, 0.0, None) * problem.finite_costs
         result_df = pd.DataFrame({
             "Показник": list(QS_INPUT.keys()),
             "2025": [float(QS_INPUT[k]) for k in QS_INPUT.keys()],
@@ -362,9 +390,9 @@ with tab1:
         plt.clf()
         
         st.subheader("📈 Динаміка покращення QS Score")
-        plot_progress(ga)
-        st.pyplot(plt)
-        plt.clf()
+        progress_fig = plot_progress(ga)
+        st.pyplot(progress_fig)
+        plt.close(progress_fig)
 
         top_df, contrib_df = get_top_solutions(ga, QS_INPUT, QS_COST, QS_WEIGHTS, top_n=10)
         
@@ -403,6 +431,23 @@ with tab1:
         st.pyplot(fig)
         
 
+    with st.expander("🎯 Фронт Парето QS Score / RU (NSGA-II)"):
+        st.markdown("Один запуск багатокритеріального GA одночасно максимізує QS Score і мінімізує витрати RU "
+                    "та повертає всі недоміновані стратегії з витратами до поточного бюджету.")
+        if st.button("🚀 Побудувати фронт Парето", key="pareto_ga"):
+            print(f"🎯 Користувач запустив NSGA-II, бюджет={MAX_RU}")
+            pareto_df, pareto_ga = run_pareto_optimization(
+                problem,
+                time_limit=ga_time_limit or None,
+                verbose=True
+            )
+            st.caption(f"Зупинка GA: {STOP_REASONS.get(pareto_ga.stop_reason, pareto_ga.stop_reason)} "
+                       f"(поколінь: {pareto_ga.generations_completed}, час: {pareto_ga.elapsed:.1f}с)")
+            pareto_fig = plot_pareto_front(pareto_df, MAX_RU)
+            st.pyplot(pareto_fig)
+            plt.close(pareto_fig)
+            st.dataframe(pareto_df, use_container_width=True)
+
     st.markdown("---")
     st.subheader("🔧 Альтернатива: Лінійне програмування (LP)")
     st.markdown("""
@@ -416,7 +461,9 @@ with tab1:
         selected = [k for k, d in QS_DELTA.items() if float(d) > 0]
         print(f"📊 Параметри: бюджет={MAX_RU}, обраних показників={len(selected)}")
         start_time = time.time()
-        x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
+        x_2026, qs_score_lp, df_lp, sensitivity = cached_solve(
+            optimize_qs_pulp,
+            algorithm="LP",
             QS_INPUT=QS_INPUT,
             QS_WEIGHTS=QS_WEIGHTS,
             QS_MAX=QS_MAX,
@@ -424,13 +471,11 @@ with tab1:
             QS_COST=QS_COST,
             MAX_RU=MAX_RU,
             selected_indicators=selected,
+            solver="auto",
+            sensitivity=True,
         )
 
-        deltas = {k: float(x_2026[k]) - float(QS_INPUT[k]) for k in QS_INPUT.keys()}
-        ru_used = sum(
-            (deltas[k] * float(QS_COST[k])) if QS_COST[k] < float("inf") else 0.0
-            for k in QS_INPUT.keys()
-        )
+        ru_used = float(problem.ru([x_2026[k] for k in problem.keys]))
         
         # Додаємо розшифровку назв показників
         df_lp['Показник'] = df_lp['Показник'].apply(lambda x: f"{x} - {INDICATOR_DESCRIPTIONS.get(x, x)}")
@@ -475,6 +520,17 @@ with tab1:
         
         st.subheader("📊 Результати LP-оптимізації")
         st.dataframe(df_lp, use_container_width=True)
+        st.caption(f"Розв'язувач: {df_lp.attrs['backend']} ({df_lp.attrs['solve_time'] * 1000:.1f} мс)"
+                   + (" - результат з кешу, розрахунок не повторювався" if df_lp.attrs.get("from_cache") else ""))
+
+        st.subheader("🔎 Чутливість: гранична цінність показників")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Тіньова ціна бюджету", f"{sensitivity['shadow_price']:.4f}", help="Приріст QS Score за додатковий 1 RU")
+        with col2:
+            budget_lo, budget_hi = sensitivity["budget_range"]
+            st.metric("Діапазон бюджету", f"{budget_lo:.1f} – {budget_hi:.1f} RU", help="У цьому діапазоні тіньова ціна не змінюється")
+        st.dataframe(sensitivity["table"], use_container_width=True)
         
         st.subheader("📈 Візуалізація результатів LP")
         
@@ -575,6 +631,80 @@ with tab1:
         plt.tight_layout()
         st.pyplot(fig)
         plt.clf()
+
+        st.subheader("💸 QS Score залежно від бюджету")
+        frontier_df = optimize_qs_frontier(
+            QS_INPUT=QS_INPUT,
+            QS_WEIGHTS=QS_WEIGHTS,
+            QS_MAX=QS_MAX,
+            QS_DELTA=QS_DELTA,
+            QS_COST=QS_COST,
+            MAX_RU=float(MAX_RU) * 1.5,
+            selected_indicators=selected,
+        )
+        fig, ax = plt.subplots(figsize=(12, 5))
+        ax.step(frontier_df["Бюджет RU"], frontier_df["QS Score"], where="post", linewidth=2, color='#2E86AB')
+        ax.axvline(float(MAX_RU), color='#E63946', linestyle='--', label='Поточний бюджет')
+        ax.set_xlabel('Бюджет RU', fontsize=12, fontweight='bold')
+        ax.set_ylabel('QS Score', fontsize=12, fontweight='bold')
+        ax.set_title('Оптимальний QS Score для кожного бюджету (LP)', fontsize=14, fontweight='bold', pad=20)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        st.pyplot(fig)
+        plt.clf()
+
+        what_if = frontier_df.set_index("Бюджет RU")
+        what_if_rows = []
+        for factor in [0.8, 0.9, 1.0, 1.1, 1.2, 1.5]:
+            budget = round(float(MAX_RU) * factor, 1)
+            row = what_if.iloc[what_if.index.get_indexer([budget], method="pad")[0]]
+            what_if_rows.append({
+                "Бюджет": f"{factor:.0%}",
+                "Бюджет RU": budget,
+                "QS Score": row["QS Score"],
+                "Витрати RU": row["Витрати RU"]
+            })
+        st.dataframe(pd.DataFrame(what_if_rows), use_container_width=True)
+
+        top_lp_df, _ = optimize_qs_k_best(
+            QS_INPUT=QS_INPUT,
+            QS_WEIGHTS=QS_WEIGHTS,
+            QS_MAX=QS_MAX,
+            QS_DELTA=QS_DELTA,
+            QS_COST=QS_COST,
+            MAX_RU=MAX_RU,
+            selected_indicators=selected,
+            top_n=10,
+        )
+        st.subheader("🏆 Топ-10 точних стратегій (LP)")
+        st.dataframe(top_lp_df, use_container_width=True)
+
+    with st.expander("📑 Пакетний розрахунок сценаріїв (LP)"):
+        st.markdown("""
+        Завантажте CSV, де кожен рядок - сценарій. Колонки перекривають поточні налаштування:
+        `Сценарій`, `MAX_RU`, `selected_indicators` (наприклад `AR,ER`), `QS_COST.AR`, `QS_DELTA.CPF`, `QS_WEIGHTS.ER` тощо.
+        """)
+        scenarios_file = st.file_uploader("CSV зі сценаріями", type=["csv"], key="lp_batch_scenarios")
+        if scenarios_file is not None and st.button("🧮 Розрахувати всі сценарії", use_container_width=True):
+            scenarios_df = pd.read_csv(scenarios_file)
+            print(f"📑 Користувач запустив пакетний LP-розрахунок: {len(scenarios_df)} сценаріїв")
+            start_time = time.time()
+            try:
+                batch_df = optimize_qs_batch(problem, scenarios_df)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            elapsed_time_batch = time.time() - start_time
+            st.success(f"✅ Розраховано {len(batch_df)} сценаріїв за {elapsed_time_batch:.1f}с (з кешу: {int(batch_df['З кешу'].sum())})")
+            st.dataframe(batch_df, use_container_width=True)
+            st.download_button(
+                "📥 Завантажити результати",
+                batch_df.to_csv(index=False).encode("utf-8"),
+                file_name="lp_scenarios_results.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
     
     # AI Аналіз секція - завжди відображається
     st.markdown("---")
@@ -784,16 +914,23 @@ with tab2:
                 start_time = time.time()
                 effective_delta = {k: (float(QS_DELTA[k]) if k in selected_keys else 0.0) for k in all_keys}
                 
+                ga_problem = dict(QS_INPUT=QS_INPUT, QS_WEIGHTS=QS_WEIGHTS, QS_MAX=QS_MAX, QS_DELTA=effective_delta, QS_COST=QS_COST, MAX_RU=MAX_RU)
                 if auto_find_params_selected:
-                    ga = run_optimization(
-                        QS_INPUT, QS_WEIGHTS, QS_MAX, effective_delta, QS_COST, MAX_RU,
+                    ga = cached_solve(
+                        solve_ga,
+                        algorithm="GA",
+                        **ga_problem,
                         auto_find_params=True,
                         n_trials=n_trials_selected,
+                        n_jobs=os.cpu_count() or 1,
+                        checkpoint=True,
                         verbose=True
                     )
                 else:
-                    ga = run_optimization(
-                        QS_INPUT, QS_WEIGHTS, QS_MAX, effective_delta, QS_COST, MAX_RU,
+                    ga = cached_solve(
+                        solve_ga,
+                        algorithm="GA",
+                        **ga_problem,
                         auto_find_params=False,
                         num_generations=num_generations_selected,
                         sol_per_pop=sol_per_pop_selected,
@@ -805,7 +942,7 @@ with tab2:
                 solution, qs_score, _ = ga.best_solution()
                 print(f"✅ GA-оптимізація обраних показників завершена, QS Score: {qs_score:.2f}")
 
-                total_ru = compute_total_ru(QS_INPUT, QS_COST, solution)
+                total_ru = compute_total_ru(problem, solution)
                 
                 experiment = save_experiment_to_session(
                     algorithm="GA_Selected",
@@ -821,13 +958,16 @@ with tab2:
                         "current_qs": current_qs
                     },
                     QS_INPUT=QS_INPUT,
-                    solution=solution
+                    solution=solution,
+                    telemetry=ga.telemetry
                 )
 
                 # Зберігаємо експеримент для AI аналізу
                 st.session_state["last_ga_selected_experiment"] = experiment
 
                 st.success("✅ **GA-оптимізація (обрані) завершена!**")
+                if ga.from_cache:
+                    st.caption(f"Результат з кешу, GA не запускався (початковий розрахунок {ga.elapsed:.1f}с)")
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
@@ -854,7 +994,9 @@ with tab2:
             if st.button("🧮 Запустити LP (обрані)", key="lp_selected", use_container_width=True):
                 print(f"🧮 Користувач запустив LP-оптимізацію обраних показників: {selected_keys}")
                 start_time = time.time()
-                x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
+                x_2026, qs_score_lp, df_lp = cached_solve(
+                    optimize_qs_pulp,
+                    algorithm="LP",
                     QS_INPUT=QS_INPUT,
                     QS_WEIGHTS=QS_WEIGHTS,
                     QS_MAX=QS_MAX,
@@ -862,14 +1004,11 @@ with tab2:
                     QS_COST=QS_COST,
                     MAX_RU=MAX_RU,
                     selected_indicators=selected_keys,
+                    solver="auto",
                 )
                 print(f"✅ LP-оптимізація обраних показників завершена, QS Score: {qs_score_lp:.2f}")
 
-                deltas = {k: float(x_2026[k]) - float(QS_INPUT[k]) for k in QS_INPUT.keys()}
-                ru_used = sum(
-                    (deltas[k] * float(QS_COST[k])) if QS_COST[k] < float("inf") else 0.0
-                    for k in QS_INPUT.keys()
-                )
+                ru_used = float(problem.ru([x_2026[k] for k in problem.keys]))
                 
                 # Додаємо розшифровку назв показників
                 df_lp['Показник'] = df_lp['Показник'].apply(lambda x: f"{x} - {INDICATOR_DESCRIPTIONS.get(x, x)}")
@@ -911,6 +1050,8 @@ with tab2:
 
                 st.subheader("📊 Результати LP-оптимізації (обрані)")
                 st.dataframe(df_lp, use_container_width=True)
+                st.caption(f"Розв'язувач: {df_lp.attrs['backend']} ({df_lp.attrs['solve_time'] * 1000:.1f} мс)"
+                           + (" - результат з кешу, розрахунок не повторювався" if df_lp.attrs.get("from_cache") else ""))
 
     # AI Аналіз секція для табу 2 - завжди відображається
     st.markdown("---")
@@ -1130,6 +1271,12 @@ with tab3:
         col1, col2 = st.columns(2)
         
         with col1:
+            topn_time_per_combo = st.number_input(
+                "⏱️ Ліміт часу на комбінацію, с (0 - без ліміту):",
+                min_value=0.0, value=0.0, step=0.5,
+                key="topn_time_per_combo",
+                disabled=(algorithm != "Генетичний алгоритм (GA)")
+            )
             if st.button("🚀 Запустити топ-N оптимізацію (GA)", type="primary", use_container_width=True, disabled=(algorithm != "Генетичний алгоритм (GA)")):
                 if algorithm == "Генетичний алгоритм (GA)":
                     print(f"🏆 Користувач запустив топ-N GA-оптимізацію: {num_indicators} показників з {len(eligible)} доступних")
@@ -1140,15 +1287,22 @@ with tab3:
                         print(f"📊 Ручні параметри для топ-N: поколінь={num_generations}, популяція={sol_per_pop}, батьки={num_parents_mating}, мутації={mutation_percent_genes}%")
                     
                     if auto_find_params_topn:
-                        run_top_n_ga_optimization(eligible, num_indicators, None, None, None, None, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=True, n_trials=n_trials_topn)
+                        run_top_n_ga_optimization(eligible, num_indicators, None, None, None, None, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=True, n_trials=n_trials_topn, time_per_combo=topn_time_per_combo or None)
                     else:
-                        run_top_n_ga_optimization(eligible, num_indicators, num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=False)
+                        run_top_n_ga_optimization(eligible, num_indicators, num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=False, time_per_combo=topn_time_per_combo or None)
         
         with col2:
+            lp_topn_milp = st.checkbox(
+                "⚡ Один MILP замість перебору комбінацій",
+                value=True,
+                help="Обмеження на кількість показників у моделі: час не залежить від кількості комбінацій",
+                key="lp_topn_milp",
+                disabled=(algorithm != "Лінійне програмування (LP)")
+            )
             if st.button("🧮 Запустити топ-N оптимізацію (LP)", type="primary", use_container_width=True, disabled=(algorithm != "Лінійне програмування (LP)")):
                 if algorithm == "Лінійне програмування (LP)":
-                    print(f"🏆 Користувач запустив топ-N LP-оптимізацію: {num_indicators} показників з {len(eligible)} доступних")
-                    run_top_n_lp_optimization(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs)
+                    print(f"🏆 Користувач запустив топ-N LP-оптимізацію: {num_indicators} показників з {len(eligible)} доступних (MILP: {lp_topn_milp})")
+                    run_top_n_lp_optimization(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, mode="milp" if lp_topn_milp else "enumerate")
 
     # AI Аналіз секція для табу 3 - завжди відображається
     st.markdown("---")
@@ -4,51 +4,239 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import optuna
 from typing import Dict, Any, Optional
+import os
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from problem import STEP, QSProblem, accepts_problem
+from lp import optimize_qs_pulp, optimize_qs_greedy
+from utils.hyperparams import HYPERPARAMS_MAX_AGE_DAYS, get_hyperparam_memory, problem_signature
+from utils.cache import solution_key
+from utils.checkpoint import checkpoint_path, clear_checkpoint, load_checkpoint, save_checkpoint
 
+@accepts_problem
 def compute_total_ru(QS_INPUT, QS_COST, solution):
-    total_ru = 0
-    for i, k in enumerate(QS_INPUT.keys()):
-        prev = QS_INPUT[k]
-        curr = solution[i]
-        delta = curr - prev
-        if QS_COST[k] != float("inf") and delta > 0:
-            total_ru += QS_COST[k] * delta
-    return total_ru
+    keys = list(QS_INPUT.keys())
+    inputs = np.array([float(QS_INPUT[k]) for k in keys])
+    costs = np.array([float(QS_COST[k]) for k in keys])
+    increase = np.clip(np.asarray(solution, dtype=float) - inputs, 0.0, None)
+    return float(increase @ np.where(np.isinf(costs), 0.0, costs))
 
 # === QS Score === #
 def compute_qs_score(solution, QS_WEIGHTS, keys):
     """Обчислює оцінку використовуючи той самий порядок ключів як у масиві рішення."""
-    return sum(float(solution[i]) * float(QS_WEIGHTS[k]) for i, k in enumerate(keys))
+    return float(np.asarray(solution, dtype=float) @ np.array([float(QS_WEIGHTS[k]) for k in keys]))
 
 # === Фітнес-функція === #
-def make_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU):
+def _fitness_arrays(QS_INPUT, QS_COST, QS_WEIGHTS):
     keys = list(QS_INPUT.keys())
+    inputs = np.array([float(QS_INPUT[k]) for k in keys])
+    weights = np.array([float(QS_WEIGHTS[k]) for k in keys])
+    costs = np.array([float(QS_COST[k]) for k in keys])
+    frozen = np.isinf(costs)
+    finite_costs = np.where(frozen, 0.0, costs)
+    return inputs, weights, frozen, finite_costs
 
-    def fitness_func(ga_instance, solution, solution_idx):
-        x_new = dict(zip(keys, solution))
-        total_ru = 0
+class FitnessCache:
+    """
+    Обмежений LRU кеш фітнесу в межах одного запуску GA.
 
-        for k in keys:
-            prev, curr = QS_INPUT[k], x_new[k]
-            delta = curr - prev
+    Ключ - цілий вектор кроків 0.1 відносно поточних значень, тож однакові на сітці
+    рішення з різним float-шумом мають один запис. Фітнес при промаху рахується для
+    канонічного вектора inputs + кроки * 0.1 (canonical), тож влучання повертає рівно те,
+    що повернув би промах, незалежно від того, який варіант з шумом прийшов першим.
+    hits/misses рахують звернення.
+    """
 
-            if QS_COST[k] == float("inf"):
-                if delta != 0:
-                    return -10000
-            else:
-                if delta > 0:
-                    cost = QS_COST[k] * delta
-                    total_ru += cost
+    def __init__(self, inputs, max_items: int = 10_000):
+        self.inputs = np.asarray(inputs, dtype=float)
+        self.max_items = max_items
+        self._values: "OrderedDict[bytes, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def steps(self, solutions):
+        return np.rint((np.atleast_2d(np.asarray(solutions, dtype=float)) - self.inputs) / STEP).astype(np.int64)
+
+    def keys(self, solutions):
+        return [row.tobytes() for row in self.steps(solutions)]
+
+    def canonical(self, solutions):
+        """Значення на сітці кроку 0.1 (без float-шуму), для яких рахується фітнес."""
+        return self.inputs + STEP * self.steps(solutions)
+
+    def get(self, key):
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._values.move_to_end(key)
+        self.hits += 1
+        return value
 
+    def set(self, key, value):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_items:
+            self._values.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._values),
+        }
+
+@accepts_problem
+def make_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU, cache: FitnessCache | None = None):
+    inputs, weights, frozen, finite_costs = _fitness_arrays(QS_INPUT, QS_COST, QS_WEIGHTS)
+    MAX_RU = float(MAX_RU)
+
+    def evaluate(x):
+        delta = x - inputs
+
+        if np.any(delta[frozen] != 0):
+            return -10000
+
+        total_ru = float((np.clip(delta, 0.0, None) * finite_costs).sum())
         if total_ru > MAX_RU:
             return -1000 * (total_ru - MAX_RU)
 
-        return compute_qs_score(solution, QS_WEIGHTS, keys)
+        return float((x * weights).sum())
+
+    def fitness_func(ga_instance, solution, solution_idx):
+        x = np.asarray(solution, dtype=float)
+        if cache is None:
+            return evaluate(x)
+
+        key = cache.keys(x)[0]
+        value = cache.get(key)
+        if value is None:
+            value = evaluate(cache.canonical(x)[0])
+            cache.set(key, value)
+        return value
 
     return fitness_func
 
+@accepts_problem
+def make_batch_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU, cache: FitnessCache | None = None):
+    """
+    Векторизована фітнес-функція для pygad з fitness_batch_size.
+
+    Оцінює всю матрицю рішень одразу (RU, штраф за бюджет, зважена сума) з тими самими
+    значеннями, що й make_fitness. Для одного рішення (1D) повертає одне число.
+    З cache обчислюються лише рядки, яких ще немає в кеші.
+    """
+    inputs, weights, frozen, finite_costs = _fitness_arrays(QS_INPUT, QS_COST, QS_WEIGHTS)
+    MAX_RU = float(MAX_RU)
+
+    def evaluate(X):
+        delta = X - inputs
+        # Порядкові суми замість матричного добутку: значення рядка не залежить від розміру
+        # пакета (BLAS округлює по-різному для 1 і N рядків), тож кеш і відновлення точні
+        total_ru = (np.clip(delta, 0.0, None) * finite_costs).sum(axis=1)
+        fitness = np.where(total_ru > MAX_RU, -1000 * (total_ru - MAX_RU), (X * weights).sum(axis=1))
+        return np.where(np.any(delta[:, frozen] != 0, axis=1), -10000.0, fitness)
+
+    def fitness_func(ga_instance, solutions, solutions_indices):
+        X = np.atleast_2d(np.asarray(solutions, dtype=float))
+
+        if cache is None:
+            fitness = evaluate(X)
+        else:
+            keys = cache.keys(X)
+            fitness = np.empty(len(X))
+            missing = []
+            for i, key in enumerate(keys):
+                value = cache.get(key)
+                if value is None:
+                    missing.append(i)
+                else:
+                    fitness[i] = value
+            if missing:
+                fitness[missing] = evaluate(cache.canonical(X[missing]))
+                for i in missing:
+                    cache.set(keys[i], float(fitness[i]))
+
+        if np.ndim(solutions) == 1:
+            return float(fitness[0])
+        return fitness
+
+    return fitness_func
+
+# === Відновлення допустимості === #
+CONSTRAINT_MODES = ("penalty", "repair")
+
+@accepts_problem
+def make_repair_callbacks(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, encoding="value"):
+    """
+    Колбеки pygad для режиму "repair": початкова популяція та нащадки після мутації
+    проєктуються на бюджет через QSProblem.repair, тож штраф у фітнесі не спрацьовує.
+    """
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+
+    def repair(genes):
+        if encoding == "steps":
+            return problem.to_steps(problem.repair(problem.from_steps(genes)))
+        return problem.repair(genes)
+
+    def on_start(ga_instance):
+        ga_instance.population[:] = repair(ga_instance.population)
+
+    def on_mutation(ga_instance, offspring_mutation):
+        return repair(offspring_mutation)
+
+    return on_start, on_mutation
+
+# === Кодування генів === #
+GENE_ENCODINGS = ("value", "steps")
+
+def decode_population(ga_instance, genes):
+    """
+    Переводить гени (рішення або матрицю популяції) у значення показників.
+
+    Для кодування "steps" ген - ціла кількість кроків 0.1 від поточного значення;
+    для "value" гени вже є значеннями й повертаються як є.
+    """
+    if getattr(ga_instance, "gene_encoding", "value") == "steps":
+        return ga_instance.qs_problem.from_steps(np.asarray(genes, dtype=np.int64))
+    return np.asarray(genes, dtype=float)
+
+def make_step_fitness(problem: QSProblem, fitness_func):
+    """Обгортає фітнес-функцію значень для генів-кроків."""
+    def step_fitness(ga_instance, solutions, solutions_indices):
+        return fitness_func(ga_instance, problem.from_steps(np.asarray(solutions, dtype=np.int64)), solutions_indices)
+    return step_fitness
+
+# === Тепле заповнення популяції === #
+@accepts_problem
+def make_seed_steps(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, *, size, random_seed=None, max_shift=2):
+    """
+    Матриця size x num_genes у кроках 0.1 для початку популяції GA.
+
+    Перші рядки - точний оптимум (optimize_qs_pulp з solver="auto") та жадібний розв'язок
+    за ефективністю, решта - їх випадкові збурення на ±max_shift кроків, відновлені
+    до допустимих через QSProblem.repair.
+    """
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    anchors = []
+    for x_2026, _, _ in (
+        optimize_qs_pulp(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, solver="auto"),
+        optimize_qs_greedy(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU),
+    ):
+        anchors.append([float(x_2026[k]) for k in problem.keys])
+    anchors = problem.to_steps(problem.repair(anchors))
+
+    rng = np.random.default_rng(random_seed)
+    base = anchors[rng.integers(len(anchors), size=max(size - len(anchors), 0))]
+    shift = rng.integers(-max_shift, max_shift + 1, size=base.shape) * ~problem.frozen
+    perturbed = problem.to_steps(problem.repair(problem.from_steps(base + shift)))
+    return np.vstack([anchors, perturbed])[:size]
+
 # === Простір генів === #
+@accepts_problem
 def generate_gene_space(QS_INPUT, QS_DELTA, QS_MAX, QS_COST):
     gene_space = []
     for k in QS_INPUT.keys():
@@ -61,25 +249,42 @@ def generate_gene_space(QS_INPUT, QS_DELTA, QS_MAX, QS_COST):
             gene_space.append({"low": low, "high": high, "step": 0.1})
     return gene_space
 
+def generate_step_gene_space(problem: QSProblem):
+    """Простір генів-кроків: 0..max_steps для кожного показника, заморожені - лише 0."""
+    return [list(range(int(n) + 1)) for n in problem.max_steps]
+
 # === Автоматичний пошук параметрів === #
-def find_optimal_parameters(
-    QS_INPUT,
-    QS_WEIGHTS,
-    QS_MAX,
-    QS_DELTA,
-    QS_COST,
-    MAX_RU,
-    *,
-    n_trials: int = 20,
-    n_trials_per_eval: int = 2,
-    verbose: bool = True
-) -> Dict[str, Any]:
+# Як часто (у поколіннях) GA звітує Optuna про найкращий фітнес для відсікання trials
+PRUNING_REPORT_EVERY = 10
+
+def _make_pruning_callback(trial, report_every):
     """
-    Автоматично знаходить оптимальні параметри для генетичного алгоритму
+    on_generation для pygad: кожні report_every поколінь передає найкращий фітнес у
+    trial.report і зупиняє GA, якщо pruner вважає trial безперспективним.
+    """
+    state = {"pruned": False}
+
+    def on_generation(ga_instance):
+        generation = ga_instance.generations_completed
+        if generation % report_every != 0:
+            return None
+        trial.report(float(ga_instance.best_solutions_fitness[-1]), step=generation)
+        if trial.should_prune():
+            state["pruned"] = True
+            return "stop"
+        return None
+
+    return on_generation, state
+
+def _make_tuning_objective(params, n_trials_per_eval, ga_options, verbose):
+    """
+    Цільова функція Optuna; створюється і в головному процесі, і у воркерах.
+
+    Trial оцінюється n_trials_per_eval запусками GA з seed random_seed + номер запуску
+    і середнім QS Score, тож повтори дають нову інформацію про стійкість параметрів.
+    Паралельність - на рівні trials (n_jobs у find_optimal_parameters), повтори одного
+    trial виконуються в його процесі.
     """
-    if verbose:
-        print(f"🔍 Початок пошуку оптимальних параметрів: {n_trials} експериментів")
-    
     def objective(trial):
         num_generations = trial.suggest_int("num_generations", 100, 500)
         sol_per_pop = trial.suggest_int("sol_per_pop", 20, 100)
@@ -87,18 +292,23 @@ def find_optimal_parameters(
         mutation_percent_genes = trial.suggest_int("mutation_percent_genes", 5, 40)
         random_seed = trial.suggest_int("random_seed", 1, 1000)
         
-        # Запускаємо кілька оцінок для стабільності
+        # Запускаємо кілька оцінок з різними seed для стабільності
         scores = []
-        for _ in range(n_trials_per_eval):
+        for eval_idx in range(n_trials_per_eval):
+            # Проміжні значення звітує лише перша оцінка, щоб кроки report не повторювались
+            on_generation, pruning = _make_pruning_callback(trial, PRUNING_REPORT_EVERY) if eval_idx == 0 else (None, None)
             try:
                 ga = run_optimization_internal(
-                    QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+                    **params,
                     num_generations=num_generations,
                     sol_per_pop=sol_per_pop,
                     num_parents_mating=num_parents_mating,
                     mutation_percent_genes=mutation_percent_genes,
                     stop_criteria="saturate_10",
-                    random_seed=random_seed
+                    random_seed=random_seed + eval_idx,
+                    on_generation=on_generation,
+                    telemetry=False,
+                    **ga_options,
                 )
                 
                 solution, qs_score, _ = ga.best_solution()
@@ -107,27 +317,295 @@ def find_optimal_parameters(
                 if verbose:
                     print(f"⚠️ Помилка в trial {trial.number}: {str(e)}")
                 scores.append(0.0)
+
+            if pruning is not None and pruning["pruned"]:
+                raise optuna.TrialPruned()
         
         return np.mean(scores)
-    
-    study = optuna.create_study(
-        direction="maximize",
-        sampler=optuna.samplers.TPESampler(),
-        pruner=optuna.pruners.MedianPruner()
-    )
-    
-    study.optimize(
-        objective,
-        n_trials=n_trials
-    )
-    
+
+    return objective
+
+def _open_storage(storage: str):
+    """Сховище Optuna: URL бази ("sqlite:///tuning.db") або шлях до журнального файлу."""
+    if "://" in storage:
+        return storage
+    from optuna.storages.journal import JournalFileBackend
+    return optuna.storages.JournalStorage(JournalFileBackend(storage))
+
+def _study_settings() -> Dict[str, Any]:
+    """Sampler і pruner автопідбору; load_study їх не зберігає, тож їх передають і при кожному повторному відкритті study."""
+    return {
+        "sampler": optuna.samplers.TPESampler(),
+        "pruner": optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=2 * PRUNING_REPORT_EVERY),
+    }
+
+def _tuning_worker(args):
+    """Воркер паралельного пошуку: під'єднується до спільного study і виконує свою частку trials."""
+    storage, study_name, n_trials, params, n_trials_per_eval, ga_options, timeout = args
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=_open_storage(storage), **_study_settings())
+    study.optimize(_make_tuning_objective(params, n_trials_per_eval, ga_options, verbose=False), n_trials=n_trials, timeout=timeout)
+    return n_trials
+
+@accepts_problem
+def find_optimal_parameters(
+    QS_INPUT,
+    QS_WEIGHTS,
+    QS_MAX,
+    QS_DELTA,
+    QS_COST,
+    MAX_RU,
+    *,
+    n_trials: int = 20,
+    n_trials_per_eval: int = 1,
+    constraint_mode: str = "penalty",
+    encoding: str = "value",
+    warm_start: bool = False,
+    n_jobs: int = 1,
+    storage: str | None = None,
+    initial_params: Optional[Dict[str, Any]] = None,
+    timeout: float | None = None,
+    checkpoint_key: str | None = None,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Автоматично знаходить оптимальні параметри для генетичного алгоритму
+
+    n_jobs > 1 розподіляє trials між процесами, які координуються через спільне сховище
+    Optuna: storage - URL ("sqlite:///tuning.db") або шлях до журнального файлу; якщо
+    не задано, використовується тимчасовий журнальний файл.
+    initial_params (наприклад, раніше знайдені параметри) оцінюються першим trial.
+    timeout (секунди) обмежує весь пошук: нові trials не стартують після нього, а GA
+    кожного trial має той самий ліміт часу.
+    checkpoint_key зберігає study у журнальний файл контрольних точок (utils.checkpoint):
+    повторний виклик з тим самим ключем продовжує study і виконує лише trials, яких бракує.
+    """
+    if verbose:
+        print(f"🔍 Початок пошуку оптимальних параметрів: {n_trials} експериментів")
+
+    params = {
+        "QS_INPUT": QS_INPUT, "QS_WEIGHTS": QS_WEIGHTS, "QS_MAX": QS_MAX,
+        "QS_DELTA": QS_DELTA, "QS_COST": QS_COST, "MAX_RU": MAX_RU,
+    }
+    ga_options = {"constraint_mode": constraint_mode, "encoding": encoding, "warm_start": warm_start, "time_limit": timeout}
+    n_jobs = max(1, min(n_jobs, n_trials))
+
+    if n_jobs == 1 and storage is None and checkpoint_key is None:
+        study = optuna.create_study(direction="maximize", **_study_settings())
+        if initial_params:
+            study.enqueue_trial(initial_params)
+        
+        study.optimize(
+            _make_tuning_objective(params, n_trials_per_eval, ga_options, verbose),
+            n_trials=n_trials,
+            timeout=timeout
+        )
+        best_value, best_params = study.best_value, study.best_params
+    else:
+        import tempfile
+        import uuid
+
+        temp_dir = None
+        if checkpoint_key is not None:
+            study_name = f"qs_ga_{checkpoint_key[:16]}"
+            if storage is None:
+                storage = str(checkpoint_path(checkpoint_key, ".optuna.log"))
+                checkpoint_path(checkpoint_key).parent.mkdir(parents=True, exist_ok=True)
+        else:
+            study_name = f"qs_ga_{uuid.uuid4().hex[:12]}"
+            if storage is None:
+                temp_dir = tempfile.TemporaryDirectory(prefix="qs_optuna_")
+                storage = os.path.join(temp_dir.name, "journal.log")
+        try:
+            study = optuna.create_study(
+                study_name=study_name,
+                storage=_open_storage(storage),
+                direction="maximize",
+                **_study_settings(),
+                load_if_exists=checkpoint_key is not None
+            )
+            finished = [t for t in study.trials if t.state.is_finished()]
+            if initial_params and not study.trials:
+                study.enqueue_trial(initial_params)
+            remaining = max(0, n_trials - len(finished))
+            if verbose and finished:
+                print(f"♻️ Продовжую пошук з контрольної точки: виконано {len(finished)} з {n_trials} trials")
+
+            n_jobs = max(1, min(n_jobs, remaining))
+            if remaining and n_jobs == 1:
+                study.optimize(
+                    _make_tuning_objective(params, n_trials_per_eval, ga_options, verbose),
+                    n_trials=remaining,
+                    timeout=timeout
+                )
+            elif remaining:
+                shares = [remaining // n_jobs + (1 if i < remaining % n_jobs else 0) for i in range(n_jobs)]
+                tasks = [(storage, study.study_name, share, params, n_trials_per_eval, ga_options, timeout) for share in shares]
+                with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    list(executor.map(_tuning_worker, tasks))
+                study = optuna.load_study(study_name=study.study_name, storage=_open_storage(storage), **_study_settings())
+            best_value, best_params = study.best_value, study.best_params
+        finally:
+            if temp_dir is not None:
+                temp_dir.cleanup()
+
     if verbose:
-        print(f"✅ Пошук завершено! Найкращий QS Score: {study.best_value:.3f}")
-        print(f"🎯 Найкращі параметри: {study.best_params}")
+        print(f"✅ Пошук завершено! Найкращий QS Score: {best_value:.3f}")
+        print(f"🎯 Найкращі параметри: {best_params}")
     
-    return study.best_params
+    return best_params
+
+# Причини зупинки GA (ga_instance.stop_reason)
+STOP_REASONS = {
+    "generations": "виконано всі покоління",
+    "saturate": "QS Score не покращується",
+    "time": "вичерпано ліміт часу",
+    "evaluations": "вичерпано ліміт оцінок фітнесу",
+    "callback": "зупинено колбеком",
+}
+
+# Телеметрія GA: один запис на покоління (ga_instance.telemetry)
+TELEMETRY_DTYPE = np.dtype([
+    ("generation", np.int32),
+    ("best", np.float64),        # найкращий фітнес покоління
+    ("mean", np.float64),        # середній фітнес
+    ("diversity", np.float64),   # частка унікальних рішень на сітці кроків 0.1
+    ("infeasible", np.float64),  # частка недопустимих рішень (бюджет або межі)
+    ("elapsed", np.float64),     # секунд від початку run()
+    ("population", np.int32),    # розмір популяції (змінюється в самоадаптивному режимі)
+    ("parents", np.int32),       # кількість батьків
+])
+
+def _population_diversity(problem: QSProblem, X) -> float:
+    """Частка унікальних рішень популяції на сітці кроків 0.1."""
+    return len(np.unique(problem.to_steps(X), axis=0)) / len(X)
+
+def _make_telemetry_recorder(problem: QSProblem, rows: list, generation_offset: int = 0, time_offset: float = 0.0):
+    """on_generation, що додає в rows рядок TELEMETRY_DTYPE для щойно завершеного покоління."""
+    def record(ga_instance):
+        X = np.atleast_2d(decode_population(ga_instance, ga_instance.population))
+        fitness = np.asarray(ga_instance.last_generation_fitness, dtype=float)
+        rows.append((
+            generation_offset + ga_instance.generations_completed,
+            float(fitness.max()),
+            float(fitness.mean()),
+            _population_diversity(problem, X),
+            float(np.mean(~problem.feasible(X))),
+            time_offset + time.monotonic() - ga_instance.run_start_time,
+            len(X),
+            ga_instance.num_parents_mating,
+        ))
+    return record
+
+# === Самоадаптивний режим === #
+# Межі розміру популяції та частки батьків відносно початкового sol_per_pop
+ADAPTIVE_POPULATION_RANGE = (1.0, 3.0)
+ADAPTIVE_PARENTS_RANGE = (0.3, 0.6)
+# Скільки поколінь без покращення вважається застоєм і нижче якого різноманіття популяція вироджена
+ADAPTIVE_PATIENCE = 5
+ADAPTIVE_DIVERSITY_FLOOR = 0.3
+# Частка популяції, що додається іммігрантами при застої або прибирається при покращенні
+ADAPTIVE_IMMIGRANT_SHARE = 0.25
+
+def adaptive_mutation_percent(mutation_percent_genes) -> tuple:
+    """Пара відсотків для pygad mutation_type="adaptive": слабкі рішення мутують удвічі сильніше, сильні - удвічі слабше."""
+    base = float(mutation_percent_genes)
+    return (min(100.0, 2 * base), max(1.0, base / 2))
+
+# Атрибути pygad.GA, які самоадаптивний режим змінює посеред run(); перевірено з pygad 3.8
+# (див. requirements.txt), при оновленні pygad звірити з тим, як він сам змінює популяцію для NSGA-III
+ADAPTIVE_GA_ATTRIBUTES = ("population", "sol_per_pop", "pop_size", "num_offspring", "num_parents_mating",
+                          "fitness_batch_size", "last_generation_fitness", "keep_elitism", "keep_parents")
+
+def _sync_num_offspring(ga_instance):
+    """num_offspring за правилом pygad (keep_elitism має пріоритет над keep_parents) без його приватних методів."""
+    if ga_instance.keep_elitism > 0:
+        ga_instance.num_offspring = ga_instance.sol_per_pop - ga_instance.keep_elitism
+    elif ga_instance.keep_parents == -1:
+        ga_instance.num_offspring = ga_instance.sol_per_pop - ga_instance.num_parents_mating
+    elif ga_instance.keep_parents == 0:
+        ga_instance.num_offspring = ga_instance.sol_per_pop
+    else:
+        ga_instance.num_offspring = ga_instance.sol_per_pop - ga_instance.keep_parents
+
+def _make_adaptive_controller(problem: QSProblem, base_population: int, encoding: str, state: dict | None = None):
+    """
+    on_generation, що змінює кількість батьків і розмір популяції за застоєм і різноманіттям.
+
+    Кількість батьків росте від нижньої до верхньої частки ADAPTIVE_PARENTS_RANGE з кожним
+    поколінням без покращення (слабший тиск відбору - ширший пошук) і одразу максимальна, якщо
+    різноманіття нижче ADAPTIVE_DIVERSITY_FLOOR. Після ADAPTIVE_PATIENCE поколінь застою або при
+    виродженні в популяцію додаються іммігранти (випадкові рішення та збурення найкращого,
+    відновлені до бюджету) до верхньої межі ADAPTIVE_POPULATION_RANGE; поки найкращий фітнес
+    покращується, популяція скорочується до нижньої межі за рахунок найгірших рішень.
+    Зміна розміру повторює те, як pygad сам збільшує популяцію для NSGA-III, але лише через
+    публічні атрибути ADAPTIVE_GA_ATTRIBUTES і cal_pop_fitness.
+    Стан (найкращий фітнес і лічильник застою) доступний як control.state для контрольних
+    точок; state - збережений стан для продовження запуску.
+    """
+    min_pop = max(4, int(round(base_population * ADAPTIVE_POPULATION_RANGE[0])))
+    max_pop = max(min_pop, int(round(base_population * ADAPTIVE_POPULATION_RANGE[1])))
+    state = dict(state) if state is not None else {"best": -np.inf, "stale": 0}
+
+    def encode(X):
+        return problem.to_steps(X) if encoding == "steps" else X
+
+    def resize(ga_instance, population, fitness=None):
+        ga_instance.population = population
+        ga_instance.sol_per_pop = len(population)
+        ga_instance.pop_size = population.shape
+        if ga_instance.fitness_batch_size is not None:
+            ga_instance.fitness_batch_size = len(population)
+        _sync_num_offspring(ga_instance)
+        ga_instance.last_generation_fitness = ga_instance.cal_pop_fitness() if fitness is None else fitness
+
+    def control(ga_instance):
+        missing = [name for name in ADAPTIVE_GA_ATTRIBUTES if not hasattr(ga_instance, name)]
+        if missing:
+            raise RuntimeError(f"Самоадаптивний режим несумісний з цією версією pygad (немає {', '.join(missing)}); потрібна pygad 3.8")
+        fitness = np.asarray(ga_instance.last_generation_fitness, dtype=float)
+        best = float(fitness.max())
+        if best > state["best"] + 1e-12:
+            state["best"], state["stale"] = best, 0
+        else:
+            state["stale"] += 1
+        X = decode_population(ga_instance, ga_instance.population)
+        degenerate = _population_diversity(problem, X) < ADAPTIVE_DIVERSITY_FLOOR
+        size = len(X)
+        step = max(1, int(round(base_population * ADAPTIVE_IMMIGRANT_SHARE)))
+
+        if (degenerate or state["stale"] >= ADAPTIVE_PATIENCE) and size < max_pop:
+            n = min(step, max_pop - size)
+            rng = ga_instance.numpy_random_generator
+            best_x = X[int(np.argmax(fitness))]
+            shift = rng.randint(-2, 3, size=(n // 2, problem.num_genes)) * ~problem.frozen
+            immigrants = np.vstack([
+                decode_population(ga_instance, ga_instance.generate_initial_population(n - n // 2)),
+                problem.from_steps(problem.to_steps(best_x) + shift),
+            ])
+            immigrants = encode(problem.repair(immigrants)).astype(ga_instance.population.dtype)
+            resize(ga_instance, np.vstack([ga_instance.population, immigrants]))
+            state["stale"] = 0
+        elif state["stale"] == 0 and not degenerate and size > min_pop:
+            keep = np.sort(np.argsort(fitness, kind="stable")[::-1][:max(min_pop, size - step)])
+            resize(ga_instance, ga_instance.population[keep], ga_instance.last_generation_fitness[keep])
+
+        low, high = ADAPTIVE_PARENTS_RANGE
+        pressure = 1.0 if degenerate else min(1.0, state["stale"] / ADAPTIVE_PATIENCE)
+        share = low + (high - low) * pressure
+        ga_instance.num_parents_mating = int(np.clip(round(share * ga_instance.sol_per_pop), 2, ga_instance.sol_per_pop))
+        _sync_num_offspring(ga_instance)
+
+    control.state = state
+    return control
+
+# Частка ліміту часу run_optimization, яку отримує автопідбір параметрів; решта - фінальний GA
+TUNING_TIME_SHARE = 0.5
+# Режими auto_find_params у run_optimization
+AUTO_MODES = ("optuna", "adaptive")
 
 # === Внутрішня функція оптимізації (без пошуку параметрів) === #
+@accepts_problem
 def run_optimization_internal(
     QS_INPUT,
     QS_WEIGHTS,
@@ -142,29 +620,235 @@ def run_optimization_internal(
     mutation_percent_genes: int = 20,
     stop_criteria: str | None = "saturate_15",
     random_seed: int | None = 42,
+    batch_fitness: bool = True,
+    constraint_mode: str = "penalty",
+    encoding: str = "value",
+    warm_start: bool = False,
+    warm_start_fraction: float = 0.25,
+    fitness_cache_size: int = 0,
+    initial_population=None,
+    on_generation=None,
+    time_limit: float | None = None,
+    max_evaluations: int | None = None,
+    telemetry: bool = False,
+    checkpoint_key: str | None = None,
+    checkpoint_every: int = 25,
+    adaptive: bool = False,
 ):
-    gene_space = generate_gene_space(QS_INPUT, QS_DELTA, QS_MAX, QS_COST)
-    fitness_func = make_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU)
+    """
+    Один запуск pygad з фіксованими параметрами.
+
+    batch_fitness=True оцінює популяцію матрицею через make_batch_fitness
+    (fitness_batch_size=sol_per_pop) замість виклику фітнес-функції для кожної особини.
+    constraint_mode: "penalty" - штраф -1000 * перевищення бюджету у фітнесі,
+    "repair" - рішення понад бюджет відновлюються до допустимих перед оцінкою.
+    encoding: "value" - ген є значенням показника з кроком 0.1, "steps" - ген є цілою
+    кількістю кроків; значення відновлюються через decode_population.
+    warm_start=True замінює частку warm_start_fraction початкової популяції розв'язками
+    make_seed_steps (LP/DP оптимум, жадібний і їх збурення); решта лишається випадковою.
+    fitness_cache_size - розмір LRU кешу фітнесу за вектором кроків; за замовчуванням 0
+    (вимкнено): векторизований фітнес дешевший за пошук у кеші, тож кеш має сенс лише для
+    дорогої фітнес-функції. Лічильники доступні через ga_instance.fitness_cache.stats().
+    initial_population - готова початкова популяція в кодуванні encoding (тоді sol_per_pop
+    береться з її розміру), використовується острівною моделлю між епохами.
+    on_generation - колбек pygad після кожного покоління (повернення "stop" зупиняє GA).
+    time_limit (секунди) та max_evaluations (кількість оцінок фітнесу) додаються до
+    stop_criteria: GA повертає найкраще знайдене на момент зупинки, а причина зупинки
+    записується в ga_instance.stop_reason (див. STOP_REASONS). pygad перевіряє обидва
+    критерії лише між поколіннями, тож ліміти округлюються вгору до цілого покоління:
+    фактична кількість оцінок може перевищити max_evaluations на розмір одного покоління
+    (num_offspring), а час - на тривалість одного покоління.
+    telemetry=True записує по кожному поколінню найкращий і середній фітнес, різноманіття,
+    частку недопустимих рішень і час у ga_instance.telemetry (масив TELEMETRY_DTYPE).
+    Запис коштує близько 20% часу покоління, тому за замовчуванням вимкнений: його вмикають
+    лише виклики, що показують телеметрію користувачу (run_optimization).
+    checkpoint_key: кожні checkpoint_every поколінь популяція, стан генераторів випадкових
+    чисел, історія, телеметрія, лічильник застою saturate_N, кількість батьків і стан
+    самоадаптивного режиму зберігаються на диск; запуск з тим самим ключем продовжує з
+    останньої контрольної точки і дає ту саму популяцію, що й неперерваний запуск (кеш
+    фітнесу не зберігається - він не впливає на значення). Ліміти time_limit і
+    max_evaluations рахуються на весь запуск разом з уже виконаною частиною. Після
+    завершення контрольна точка видаляється, покинуті - через CHECKPOINT_MAX_AGE_DAYS.
+    adaptive=True - самоадаптивний режим: адаптивна мутація pygad з парою
+    adaptive_mutation_percent(mutation_percent_genes), а кількість батьків і розмір популяції
+    змінюються за застоєм і різноманіттям (_make_adaptive_controller); sol_per_pop і
+    num_parents_mating задають лише початок.
+    """
+    if constraint_mode not in CONSTRAINT_MODES:
+        raise ValueError(f"Невідомий режим обмежень '{constraint_mode}'. Доступні: {', '.join(CONSTRAINT_MODES)}")
+    if encoding not in GENE_ENCODINGS:
+        raise ValueError(f"Невідоме кодування генів '{encoding}'. Доступні: {', '.join(GENE_ENCODINGS)}")
+
+    base_population, total_generations = sol_per_pop, num_generations
+    criteria = [stop_criteria] if isinstance(stop_criteria, str) else list(stop_criteria or [])
+    saturate_limit = None
+    if checkpoint_key is not None:
+        # Лічильник застою pygad живе лише всередині run(), тож з контрольними точками
+        # saturate_N рахується в on_generation і зберігається разом з популяцією
+        saturate = [int(c.split("_", 1)[1]) for c in criteria if c.startswith("saturate_")]
+        criteria = [c for c in criteria if not c.startswith("saturate_")]
+        saturate_limit = min(saturate) if saturate else None
+
+    resumed = load_checkpoint(checkpoint_key) if checkpoint_key is not None else None
+    generation_offset, time_offset, evaluation_offset, history_prefix = 0, 0.0, 0, []
+    run_state = {"stopped": False, "unchanged": 0, "saturated": False}
+    restart_evaluations = 0
+    if resumed is not None:
+        initial_population = resumed["population"]
+        generation_offset, time_offset = resumed["generations"], resumed["elapsed"]
+        evaluation_offset, history_prefix = resumed["evaluations"], resumed["history"]
+        num_parents_mating = resumed["num_parents_mating"]
+        run_state["unchanged"] = resumed["unchanged"]
+        run_state["saturated"] = saturate_limit is not None and run_state["unchanged"] >= saturate_limit
+        # Продовжений run() заново оцінює відновлену популяцію, чого не було в перерваному запуску
+        restart_evaluations = len(initial_population)
+        exhausted = (
+            run_state["saturated"]
+            or (time_limit is not None and time_offset >= float(time_limit))
+            or (max_evaluations is not None and evaluation_offset >= int(max_evaluations))
+        )
+        # Контрольна точка останнього покоління або вже зупиненого запуску: лише відновлюємо результат
+        num_generations = 0 if exhausted else max(0, num_generations - generation_offset)
+
+    if initial_population is not None:
+        initial_population = np.asarray(initial_population)
+        sol_per_pop = len(initial_population)
+
+    if time_limit is not None:
+        criteria.append(f"time_{max(float(time_limit) - time_offset, 0.0)}")
+    if max_evaluations is not None:
+        criteria.append(f"evaluations_{max(int(max_evaluations) - evaluation_offset, 0) + restart_evaluations}")
+
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    telemetry_rows = list(resumed["telemetry"]) if resumed is not None else []
+    record_telemetry = _make_telemetry_recorder(problem, telemetry_rows, generation_offset, time_offset) if telemetry else None
+    adapt = None
+    if adaptive:
+        adapt = _make_adaptive_controller(problem, base_population, encoding, state=resumed["adaptive"] if resumed is not None else None)
+
+    def merged_history(ga_instance):
+        # pygad додає найкращий фітнес покоління на початку наступного, тож збережена історія
+        # закінчується перед поколінням контрольної точки, а продовжений запуск починається з нього
+        return history_prefix + [float(f) for f in ga_instance.best_solutions_fitness]
+
+    def evaluations_done(ga_instance):
+        return evaluation_offset + ga_instance.num_fitness_evaluations - restart_evaluations
+
+    def write_checkpoint(ga_instance):
+        save_checkpoint(checkpoint_key, {
+            "population": np.array(ga_instance.population),
+            "generations": generation_offset + ga_instance.generations_completed,
+            "elapsed": time_offset + time.monotonic() - ga_instance.run_start_time,
+            "evaluations": evaluations_done(ga_instance),
+            "history": merged_history(ga_instance),
+            "telemetry": list(telemetry_rows),
+            "rng": (ga_instance.numpy_random_generator.get_state(), ga_instance.python_random_generator.getstate()),
+            "num_parents_mating": ga_instance.num_parents_mating,
+            "unchanged": run_state["unchanged"],
+            "adaptive": dict(adapt.state) if adapt is not None else None,
+        })
+
+    def track_saturation(ga_instance):
+        # Те саме правило, що saturate_N у pygad: найкращий фітнес не змінився за покоління
+        best = float(np.max(ga_instance.last_generation_fitness))
+        run_state["unchanged"] = run_state["unchanged"] + 1 if best == ga_instance.best_solutions_fitness[-1] else 0
+        run_state["saturated"] = run_state["unchanged"] >= saturate_limit
+
+    user_on_generation = on_generation
+    if user_on_generation is not None or record_telemetry is not None or checkpoint_key is not None or adapt is not None:
+        def on_generation(ga_instance):
+            if saturate_limit is not None:
+                track_saturation(ga_instance)
+            if record_telemetry is not None:
+                record_telemetry(ga_instance)
+            if adapt is not None:
+                adapt(ga_instance)
+            if checkpoint_key is not None and ga_instance.generations_completed % checkpoint_every == 0:
+                write_checkpoint(ga_instance)
+            result = user_on_generation(ga_instance) if user_on_generation is not None else None
+            if isinstance(result, str) and result.lower() == "stop":
+                run_state["stopped"] = True
+                return result
+            return "stop" if run_state["saturated"] else result
+
+    on_start, on_mutation = None, None
+    if constraint_mode == "repair":
+        on_start, on_mutation = make_repair_callbacks(problem, encoding=encoding)
+
+    fitness_cache = FitnessCache(problem.inputs, fitness_cache_size) if fitness_cache_size > 0 else None
+    if batch_fitness:
+        fitness_func = make_batch_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU, cache=fitness_cache)
+    else:
+        fitness_func = make_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, MAX_RU, cache=fitness_cache)
+
+    if encoding == "steps":
+        gene_space = generate_step_gene_space(problem)
+        gene_type = int
+        fitness_func = make_step_fitness(problem, fitness_func)
+    else:
+        gene_space = generate_gene_space(QS_INPUT, QS_DELTA, QS_MAX, QS_COST)
+        gene_type = float
 
     ga_instance = pygad.GA(
         num_generations=num_generations,
         num_parents_mating=num_parents_mating,
         fitness_func=fitness_func,
+        fitness_batch_size=sol_per_pop if batch_fitness else None,
         sol_per_pop=sol_per_pop,
+        initial_population=initial_population,
         num_genes=len(QS_INPUT),
         gene_space=gene_space,
-        mutation_percent_genes=mutation_percent_genes,
-        mutation_type="random",
+        gene_type=gene_type,
+        mutation_percent_genes=adaptive_mutation_percent(mutation_percent_genes) if adaptive else mutation_percent_genes,
+        mutation_type="adaptive" if adaptive else "random",
         random_mutation_min_val=0,
         random_mutation_max_val=1,
-        stop_criteria=stop_criteria,
+        stop_criteria=criteria or None,
         random_seed=random_seed,
+        on_start=on_start,
+        on_mutation=on_mutation,
+        on_generation=on_generation,
     )
+    ga_instance.gene_encoding = encoding
+    ga_instance.qs_problem = problem
+    ga_instance.fitness_cache = fitness_cache
+
+    if resumed is not None:
+        numpy_state, python_state = resumed["rng"]
+        ga_instance.numpy_random_generator.set_state(numpy_state)
+        ga_instance.python_random_generator.setstate(python_state)
+    elif warm_start:
+        n_seeds = min(sol_per_pop, max(1, int(round(sol_per_pop * warm_start_fraction))))
+        seeds = make_seed_steps(problem, size=n_seeds, random_seed=random_seed)
+        ga_instance.population[:n_seeds] = seeds if encoding == "steps" else problem.from_steps(seeds)
 
     ga_instance.run()
+
+    ga_instance.elapsed = time_offset + time.monotonic() - ga_instance.run_start_time
+    ga_instance.telemetry = np.array(telemetry_rows, dtype=TELEMETRY_DTYPE) if telemetry else None
+    if run_state["stopped"]:
+        ga_instance.stop_reason = "callback"
+    elif run_state["saturated"]:
+        ga_instance.stop_reason = "saturate"
+    elif generation_offset + ga_instance.generations_completed >= total_generations:
+        ga_instance.stop_reason = "generations"
+    elif time_limit is not None and ga_instance.elapsed >= float(time_limit):
+        ga_instance.stop_reason = "time"
+    elif max_evaluations is not None and evaluations_done(ga_instance) >= int(max_evaluations):
+        ga_instance.stop_reason = "evaluations"
+    else:
+        ga_instance.stop_reason = "saturate"
+
+    if resumed is not None:
+        ga_instance.best_solutions_fitness = merged_history(ga_instance)
+        ga_instance.generations_completed += generation_offset
+        ga_instance.num_fitness_evaluations = evaluations_done(ga_instance)
+    if checkpoint_key is not None:
+        clear_checkpoint(checkpoint_key)
     return ga_instance
 
 # === Основна функція оптимізації з автоматичним пошуком параметрів === #
+@accepts_problem
 def run_optimization(
     QS_INPUT,
     QS_WEIGHTS,
@@ -175,13 +859,25 @@ def run_optimization(
     *,
     auto_find_params: bool = True,
     n_trials: int = 15,
-    n_trials_per_eval: int = 2,
+    n_trials_per_eval: int = 1,
     num_generations: Optional[int] = None,
     sol_per_pop: Optional[int] = None,
     num_parents_mating: Optional[int] = None,
     mutation_percent_genes: Optional[int] = None,
     stop_criteria: str | None = "saturate_15",
     random_seed: int | None = 42,
+    constraint_mode: str = "penalty",
+    encoding: str = "value",
+    warm_start: bool = False,
+    n_jobs: int = 1,
+    param_memory: bool = True,
+    max_param_age_days: float | None = HYPERPARAMS_MAX_AGE_DAYS,
+    time_limit: float | None = None,
+    max_evaluations: int | None = None,
+    telemetry: bool = True,
+    checkpoint: bool = False,
+    checkpoint_every: int = 25,
+    auto_mode: str = "optuna",
     verbose: bool = True
 ):
     """
@@ -190,23 +886,81 @@ def run_optimization(
     Args:
         auto_find_params: Чи автоматично шукати оптимальні параметри
         n_trials: Кількість експериментів для пошуку параметрів
-        n_trials_per_eval: Кількість оцінок на експеримент
+        n_trials_per_eval: Кількість запусків GA (з різними seed) на експеримент
         timeout_minutes: Максимальний час пошуку параметрів
+        constraint_mode: "penalty" (штраф за бюджет) або "repair" (відновлення допустимості)
+        encoding: "value" (гени - значення) або "steps" (гени - цілі кроки по 0.1)
+        warm_start: Чи засівати частину початкової популяції LP/жадібними розв'язками
+        n_jobs: Кількість процесів для паралельних trials пошуку параметрів
+        param_memory: Чи брати параметри з пам'яті за підписом задачі (utils.hyperparams)
+        max_param_age_days: Вік, після якого збережені параметри лише стартова точка
+            для Optuna, а не готова відповідь (None - ніколи не застарівають)
+        time_limit: Ліміт часу всього виклику в секундах; автопідбір отримує частку
+            TUNING_TIME_SHARE, фінальний GA - залишок і повертає найкраще знайдене
+        max_evaluations: Максимальна кількість оцінок фітнесу фінального GA, округлена
+            вгору до цілого покоління (перевіряється pygad між поколіннями)
+        telemetry: Чи записувати телеметрію фінального GA (ga_instance.telemetry);
+            запуски автопідбору телеметрію не записують
+        checkpoint: Зберігати study автопідбору та популяцію GA (кожні checkpoint_every
+            поколінь) на диск і продовжувати з них повторний виклик з тими самими параметрами
+        auto_mode: Як підбирати параметри при auto_find_params: "optuna" - пошук Optuna
+            перед фінальним GA, "adaptive" - один самоадаптивний запуск GA без пошуку
         verbose: Чи виводити інформацію про пошук
         ... інші параметри GA
     """
     
-    # Якщо потрібно автоматично знайти параметри
-    if auto_find_params and all(param is None for param in [num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes]):
-        if verbose:
-            print("🔍 Автоматичний пошук оптимальних параметрів...")
-        
-        optimal_params = find_optimal_parameters(
-            QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
-            n_trials=n_trials,
-            n_trials_per_eval=n_trials_per_eval,
-            verbose=verbose
+    if auto_mode not in AUTO_MODES:
+        raise ValueError(f"Невідомий режим автопідбору '{auto_mode}'. Доступні: {', '.join(AUTO_MODES)}")
+
+    start_time = time.monotonic()
+    problem_params = (QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    manual_params = any(param is not None for param in [num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes])
+    adaptive = auto_find_params and auto_mode == "adaptive" and not manual_params
+    tuning_key = None
+    if checkpoint and not adaptive:
+        tuning_key = solution_key(
+            *problem_params, algorithm="GA_tuning",
+            n_trials=n_trials, n_trials_per_eval=n_trials_per_eval,
+            constraint_mode=constraint_mode, encoding=encoding, warm_start=warm_start,
         )
+
+    if adaptive and verbose:
+        print("🧬 Самоадаптивний GA: параметри підлаштовуються під час запуску, без пошуку Optuna")
+
+    # Якщо потрібно автоматично знайти параметри
+    if auto_find_params and not adaptive and not manual_params:
+        memory, signature, remembered = None, None, None
+        if param_memory:
+            memory = get_hyperparam_memory()
+            signature = problem_signature(
+                QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+                constraint_mode=constraint_mode, encoding=encoding, warm_start=warm_start
+            )
+            remembered = memory.lookup(signature)
+
+        if remembered is not None and (max_param_age_days is None or remembered["age_days"] <= max_param_age_days):
+            if verbose:
+                print(f"💾 Використовую збережені параметри для {signature} (вік {remembered['age_days']:.1f} дн.)")
+            optimal_params = remembered["params"]
+        else:
+            if verbose:
+                print("🔍 Автоматичний пошук оптимальних параметрів...")
+            
+            optimal_params = find_optimal_parameters(
+                QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+                n_trials=n_trials,
+                n_trials_per_eval=n_trials_per_eval,
+                constraint_mode=constraint_mode,
+                encoding=encoding,
+                warm_start=warm_start,
+                n_jobs=n_jobs,
+                initial_params=remembered["params"] if remembered is not None else None,
+                timeout=time_limit * TUNING_TIME_SHARE if time_limit is not None else None,
+                checkpoint_key=tuning_key,
+                verbose=verbose
+            )
+            if memory is not None:
+                memory.store(signature, optimal_params)
         
         # Використовуємо знайдені параметри
         num_generations = optimal_params["num_generations"]
@@ -228,57 +982,472 @@ def run_optimization(
     if mutation_percent_genes is None:
         mutation_percent_genes = 20
     
+    ga_key = None
+    if checkpoint:
+        ga_key = solution_key(
+            *problem_params, algorithm="GA", seed=random_seed,
+            num_generations=num_generations, sol_per_pop=sol_per_pop,
+            num_parents_mating=num_parents_mating, mutation_percent_genes=mutation_percent_genes,
+            stop_criteria=stop_criteria, constraint_mode=constraint_mode, encoding=encoding,
+            warm_start=warm_start, max_evaluations=max_evaluations, adaptive=adaptive,
+            telemetry=telemetry,
+        )
+
     # Запускаємо оптимізацію з фінальними параметрами
-    return run_optimization_internal(
+    ga_instance = run_optimization_internal(
         QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
         num_generations=num_generations,
         sol_per_pop=sol_per_pop,
         num_parents_mating=num_parents_mating,
         mutation_percent_genes=mutation_percent_genes,
         stop_criteria=stop_criteria,
-        random_seed=random_seed
+        random_seed=random_seed,
+        constraint_mode=constraint_mode,
+        encoding=encoding,
+        warm_start=warm_start,
+        time_limit=max(0.0, time_limit - (time.monotonic() - start_time)) if time_limit is not None else None,
+        max_evaluations=max_evaluations,
+        telemetry=telemetry,
+        checkpoint_key=ga_key,
+        checkpoint_every=checkpoint_every,
+        adaptive=adaptive,
+    )
+    if tuning_key is not None:
+        # Study автопідбору потрібен лише до завершення фінального GA
+        clear_checkpoint(tuning_key, ".optuna.log")
+    return ga_instance
+
+# === Острівна модель (паралельний GA) === #
+def _run_island_epoch(args):
+    """Одна епоха одного острова у процесі-воркері (функція верхнього рівня для pickle)."""
+    params, population, ga_kwargs = args
+    ga = run_optimization_internal(**params, initial_population=population, stop_criteria=None, **ga_kwargs)
+    fitness = np.asarray(ga.last_generation_fitness, dtype=float)
+    return np.asarray(ga.population), fitness, [float(f) for f in ga.best_solutions_fitness], ga.telemetry
+
+@accepts_problem
+def run_island_optimization(
+    QS_INPUT,
+    QS_WEIGHTS,
+    QS_MAX,
+    QS_DELTA,
+    QS_COST,
+    MAX_RU,
+    *,
+    num_islands: int = 4,
+    migration_interval: int = 20,
+    num_migrants: int = 2,
+    num_generations: int = 400,
+    sol_per_pop: int = 60,
+    num_parents_mating: int = 24,
+    mutation_percent_genes: int = 20,
+    saturate_epochs: int | None = 3,
+    random_seed: int | None = 42,
+    max_workers: int | None = None,
+    encoding: str = "value",
+    constraint_mode: str = "penalty",
+    warm_start: bool = False,
+    telemetry: bool = False,
+) -> Dict[str, Any]:
+    """
+    Острівна модель GA: num_islands популяцій еволюціонують у окремих процесах.
+
+    Кожні migration_interval поколінь (епоха) num_migrants найкращих особин кожного острова
+    замінюють найгірших на наступному острові по кільцю. Пошук зупиняється після
+    num_generations поколінь або якщо глобальний найкращий фітнес не змінився
+    saturate_epochs епох поспіль.
+
+    Повертає словник: solution (значення показників), qs_score, ru, best_island,
+    histories (найкращий фітнес кожного острова по поколіннях), telemetry (масив TELEMETRY_DTYPE
+    на острів; elapsed у ньому - від початку епохи; None, якщо telemetry=False),
+    generations, migrations, elapsed.
+    """
+    start_time = time.time()
+    params = {
+        "QS_INPUT": QS_INPUT, "QS_WEIGHTS": QS_WEIGHTS, "QS_MAX": QS_MAX,
+        "QS_DELTA": QS_DELTA, "QS_COST": QS_COST, "MAX_RU": MAX_RU,
+    }
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    base_seed = 0 if random_seed is None else int(random_seed)
+    ga_kwargs = {
+        "num_generations": migration_interval,
+        "num_parents_mating": num_parents_mating,
+        "mutation_percent_genes": mutation_percent_genes,
+        "encoding": encoding,
+        "constraint_mode": constraint_mode,
+        "telemetry": telemetry,
+    }
+
+    num_epochs = max(1, -(-num_generations // migration_interval))
+    populations = [None] * num_islands
+    histories = [[] for _ in range(num_islands)]
+    telemetry_parts = [[] for _ in range(num_islands)]
+    best_fitness, stale_epochs, migrations, generations = -np.inf, 0, 0, 0
+
+    max_workers = min(num_islands, max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for epoch in range(num_epochs):
+            tasks = []
+            for island in range(num_islands):
+                kwargs = dict(ga_kwargs, random_seed=base_seed + 1000 * island + epoch)
+                if epoch == 0:
+                    kwargs.update(sol_per_pop=sol_per_pop, warm_start=warm_start and island == 0)
+                tasks.append((params, populations[island], kwargs))
+
+            results = list(executor.map(_run_island_epoch, tasks))
+            generations += migration_interval
+            fitnesses = []
+            for island, (population, fitness, history, island_telemetry) in enumerate(results):
+                populations[island] = population
+                fitnesses.append(fitness)
+                if island_telemetry is not None:
+                    island_telemetry = island_telemetry.copy()
+                    island_telemetry["generation"] += epoch * migration_interval
+                    telemetry_parts[island].append(island_telemetry)
+                # Перше значення кожної епохи - оцінка стартової популяції, вона вже є в історії
+                histories[island].extend(history if epoch == 0 else history[1:])
+
+            epoch_best = max(float(f.max()) for f in fitnesses)
+            if epoch_best > best_fitness + 1e-12:
+                best_fitness, stale_epochs = epoch_best, 0
+            else:
+                stale_epochs += 1
+            if saturate_epochs is not None and stale_epochs >= saturate_epochs:
+                break
+            if epoch == num_epochs - 1 or num_islands < 2 or num_migrants <= 0:
+                continue
+
+            # Кільцева міграція: найкращі з острова i замінюють найгірших на острові i+1
+            migrants = [populations[i][np.argsort(fitnesses[i])[::-1][:num_migrants]].copy() for i in range(num_islands)]
+            for i in range(num_islands):
+                target = (i + 1) % num_islands
+                worst = np.argsort(fitnesses[target])[:num_migrants]
+                populations[target][worst] = migrants[i]
+            migrations += 1
+
+    best_island = int(np.argmax([float(f.max()) for f in fitnesses]))
+    genes = populations[best_island][int(np.argmax(fitnesses[best_island]))]
+    solution = problem.from_steps(genes) if encoding == "steps" else np.asarray(genes, dtype=float)
+
+    return {
+        "solution": solution,
+        "qs_score": float(fitnesses[best_island].max()),
+        "ru": float(problem.ru(solution)),
+        "best_island": best_island,
+        "histories": histories,
+        "telemetry": [np.concatenate(parts) for parts in telemetry_parts] if telemetry else None,
+        "generations": generations,
+        "migrations": migrations,
+        "elapsed": time.time() - start_time,
+    }
+
+# === Багатокритеріальна оптимізація (NSGA-II) === #
+def pareto_mask(scores, rus, tol: float = 1e-9):
+    """
+    Маска недомінованих точок (максимум QS Score, мінімум RU).
+
+    Точки сортуються за зростанням RU (при рівних - за спаданням QS Score); точка
+    недомінована, якщо її QS Score строго більший за всі дешевші. Дублікати відкидаються.
+    """
+    scores = np.asarray(scores, dtype=float)
+    rus = np.asarray(rus, dtype=float)
+    order = np.lexsort((-scores, rus))
+    best_before = np.maximum.accumulate(np.r_[-np.inf, scores[order][:-1]])
+    mask = np.zeros(len(scores), dtype=bool)
+    mask[order] = scores[order] > best_before + tol
+    return mask
+
+def _non_dominated_sorting(fitness):
+    """
+    Векторизована заміна pygad non_dominated_sorting з тим самим результатом.
+
+    pygad порівнює пари рішень у циклі Python (O(n^2) викликів NumPy на фронт), що при
+    популяції 100 займає більшу частину часу покоління; тут матриця домінування
+    будується одним broadcast, а фронти знімаються по черзі.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    # dominated_by[i, j]: рішення j домінує рішення i (pygad максимізує всі цілі)
+    dominated_by = np.all(fitness[None, :, :] >= fitness[:, None, :], axis=2) & np.any(fitness[None, :, :] > fitness[:, None, :], axis=2)
+
+    fronts_indices = np.full(len(fitness), -1)
+    pareto_fronts = []
+    remaining = np.ones(len(fitness), dtype=bool)
+    while remaining.any():
+        members = np.flatnonzero(remaining & ~np.any(dominated_by[:, remaining], axis=1))
+        front = np.empty((len(members), 2), dtype=object)
+        front[:, 0] = members
+        front[:, 1] = list(fitness[members])
+        pareto_fronts.append(front)
+        fronts_indices[members] = len(pareto_fronts) - 1
+        remaining[members] = False
+    return pareto_fronts, fronts_indices
+
+class _ParetoGA(pygad.GA):
+    """pygad.GA з векторизованим non_dominated_sorting для NSGA-II."""
+
+    # Перевизначає pygad.utils.nsga.NSGA.non_dominated_sorting (pygad 3.8, див. requirements.txt):
+    # формат результату - список фронтів з рядками (індекс, вектор фітнесу) і масив номерів
+    # фронтів - внутрішній для pygad; при оновленні pygad звірити з його реалізацією
+    def non_dominated_sorting(self, fitness):
+        return _non_dominated_sorting(fitness)
+
+@accepts_problem
+def run_pareto_optimization(
+    QS_INPUT,
+    QS_WEIGHTS,
+    QS_MAX,
+    QS_DELTA,
+    QS_COST,
+    MAX_RU,
+    *,
+    num_generations: int = 300,
+    sol_per_pop: int = 100,
+    num_parents_mating: int = 50,
+    mutation_percent_genes: int = 20,
+    saturate_generations: int | None = 30,
+    random_seed: int | None = 42,
+    warm_start: bool = True,
+    time_limit: float | None = None,
+    verbose: bool = False,
+):
+    """
+    Фронт Парето QS Score / витрати RU за один запуск NSGA-II.
+
+    Фітнес - пара [QS Score, -RU], батьки відбираються pygad "nsga2" (недоміновані фронти
+    та crowding distance). Гени - кроки 0.1, рішення відновлюються до бюджету MAX_RU через
+    QSProblem.repair, тож MAX_RU - верхня межа дослідженого діапазону витрат. Фронт
+    збирається з усіх поколінь, а не лише з останньої популяції; GA зупиняється, коли фронт
+    не змінюється saturate_generations поколінь поспіль, або за time_limit. При warm_start
+    популяція містить поточний стан (0 RU) і розв'язки make_seed_steps для MAX_RU.
+
+    Повертає (DataFrame фронту, відсортований за RU, з колонками "QS Score", "Витрати RU"
+    та значеннями показників - як у optimize_qs_frontier; ga_instance).
+    """
+    start_time = time.time()
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    # Архів недомінованих рішень усіх поколінь у кроках 0.1
+    archive = np.empty((0, problem.num_genes), dtype=np.int64)
+    state = {"stale": 0}
+
+    def fitness_func(ga_instance, solutions, solutions_indices):
+        X = problem.from_steps(np.atleast_2d(np.asarray(solutions, dtype=np.int64)))
+        fitness = np.column_stack([problem.score(X), -problem.ru(X)])
+        return fitness[0] if np.ndim(solutions) == 1 else fitness
+
+    def collect(ga_instance):
+        """Оновлює архів; повертає True, якщо до фронту додалося нове рішення."""
+        nonlocal archive
+        candidates = np.unique(np.vstack([archive, np.asarray(ga_instance.population, dtype=np.int64)]), axis=0)
+        X = problem.from_steps(candidates)
+        front = candidates[pareto_mask(problem.score(X), problem.ru(X))]
+        changed = len(front) != len(archive) or not np.array_equal(front, archive)
+        archive = front
+        return changed
+
+    repair_start, on_mutation = make_repair_callbacks(problem, encoding="steps")
+
+    def on_start(ga_instance):
+        repair_start(ga_instance)
+        collect(ga_instance)
+
+    def on_generation(ga_instance):
+        state["stale"] = 0 if collect(ga_instance) else state["stale"] + 1
+        if saturate_generations is not None and state["stale"] >= saturate_generations:
+            return "stop"
+        return None
+
+    criteria = [f"time_{max(float(time_limit), 0.0)}"] if time_limit is not None else None
+
+    ga_instance = _ParetoGA(
+        num_generations=num_generations,
+        num_parents_mating=num_parents_mating,
+        fitness_func=fitness_func,
+        fitness_batch_size=sol_per_pop,
+        sol_per_pop=sol_per_pop,
+        num_genes=problem.num_genes,
+        gene_space=generate_step_gene_space(problem),
+        gene_type=int,
+        parent_selection_type="nsga2",
+        mutation_percent_genes=mutation_percent_genes,
+        mutation_type="random",
+        stop_criteria=criteria,
+        random_seed=random_seed,
+        on_start=on_start,
+        on_mutation=on_mutation,
+        on_generation=on_generation,
     )
+    ga_instance.gene_encoding = "steps"
+    ga_instance.qs_problem = problem
+
+    if warm_start:
+        n_seeds = max(1, sol_per_pop // 4)
+        ga_instance.population[0] = 0
+        ga_instance.population[1:n_seeds] = make_seed_steps(problem, size=n_seeds - 1, random_seed=random_seed)
+
+    ga_instance.run()
+    ga_instance.elapsed = time.time() - start_time
+    if saturate_generations is not None and state["stale"] >= saturate_generations:
+        ga_instance.stop_reason = "saturate"
+    elif ga_instance.generations_completed >= num_generations:
+        ga_instance.stop_reason = "generations"
+    else:
+        ga_instance.stop_reason = "time"
+
+    X = problem.from_steps(archive)
+    scores, rus = problem.score(X), problem.ru(X)
+    order = np.argsort(rus, kind="stable")
+
+    front = pd.DataFrame(X[order], columns=list(problem.keys))
+    front.insert(0, "Витрати RU", np.round(rus[order], 6))
+    front.insert(0, "QS Score", scores[order])
+    front = front.reset_index(drop=True)
+
+    if verbose:
+        print(f"🎯 NSGA-II: {len(front)} недомінованих рішень за {ga_instance.generations_completed} поколінь "
+              f"({ga_instance.elapsed:.1f}с), RU від {rus.min():.1f} до {rus.max():.1f}")
+    return front, ga_instance
+
+def plot_pareto_front(front: pd.DataFrame, MAX_RU: float | None = None):
+    """Фронт Парето QS Score / RU зі сходинками між точками; повертає Figure."""
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.step(front["Витрати RU"], front["QS Score"], where="post", color='#2E86AB', linewidth=1.5, alpha=0.6)
+    ax.scatter(front["Витрати RU"], front["QS Score"], color='#2E86AB', s=25, zorder=3, label='Недоміновані рішення (NSGA-II)')
+    if MAX_RU is not None:
+        ax.axvline(float(MAX_RU), color='#E63946', linestyle='--', label='Поточний бюджет')
+    ax.set_xlabel('Витрати RU', fontsize=12, fontweight='bold')
+    ax.set_ylabel('QS Score', fontsize=12, fontweight='bold')
+    ax.set_title('Фронт Парето: QS Score проти витрат RU', fontsize=14, fontweight='bold', pad=20)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+class GAResult:
+    """
+    Підсумок запуску GA, який можна серіалізувати (кеш розв'язків, сесія).
+
+    Екземпляр pygad містить замикання фітнес-функції й не пакується в pickle; GAResult
+    зберігає лише те, що читають сторінки, під тими самими іменами атрибутів, тож
+    best_solution(), plot_progress та get_top_solutions працюють з ним як з ga_instance.
+    population - остання популяція вже у значеннях показників.
+    """
+
+    gene_encoding = "value"
+
+    def __init__(self, solution, qs_score, population, qs_problem, telemetry, best_solutions_fitness,
+                 stop_reason, generations_completed, num_fitness_evaluations, elapsed):
+        self.solution = np.asarray(solution, dtype=float)
+        self.qs_score = float(qs_score)
+        self.population = np.asarray(population, dtype=float)
+        self.qs_problem = qs_problem
+        self.telemetry = telemetry
+        self.best_solutions_fitness = list(best_solutions_fitness)
+        self.stop_reason = stop_reason
+        self.generations_completed = generations_completed
+        self.num_fitness_evaluations = num_fitness_evaluations
+        self.elapsed = elapsed
+        # Позначається cached_solve, якщо результат прочитано з кешу
+        self.from_cache = False
+
+    @classmethod
+    def from_ga(cls, ga_instance) -> "GAResult":
+        genes, fitness, _ = ga_instance.best_solution()
+        return cls(
+            solution=decode_population(ga_instance, genes),
+            qs_score=fitness,
+            population=decode_population(ga_instance, ga_instance.population),
+            qs_problem=ga_instance.qs_problem,
+            telemetry=getattr(ga_instance, "telemetry", None),
+            best_solutions_fitness=ga_instance.best_solutions_fitness,
+            stop_reason=getattr(ga_instance, "stop_reason", None),
+            generations_completed=ga_instance.generations_completed,
+            num_fitness_evaluations=getattr(ga_instance, "num_fitness_evaluations", None),
+            elapsed=getattr(ga_instance, "elapsed", None),
+        )
+
+    def best_solution(self):
+        """(рішення, QS Score, None) - той самий порядок, що й у pygad."""
+        return self.solution, self.qs_score, None
+
+@accepts_problem
+def solve_ga(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators=None, **kwargs) -> GAResult:
+    """
+    run_optimization, що повертає GAResult; сигнатура сумісна з utils.cache.cached_solve.
+
+    selected_indicators обмежує оптимізацію цими показниками (решта отримує QS_DELTA = 0).
+    """
+    if selected_indicators is not None:
+        QS_DELTA = {k: (float(QS_DELTA.get(k, 0.0)) if k in selected_indicators else 0.0) for k in QS_INPUT}
+    return GAResult.from_ga(run_optimization(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, **kwargs))
 
 def plot_progress(ga_instance):
-    plt.figure(figsize=(10, 6))
-    plt.plot(ga_instance.best_solutions_fitness, linewidth=2, color='#2E86AB')
-    plt.xlabel("Покоління", fontsize=12, fontweight='bold')
-    plt.ylabel("QS Overall Score", fontsize=12, fontweight='bold')
-    plt.title("Динаміка покращення QS Score", fontsize=14, fontweight='bold', pad=20)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.show()
-    
+    """
+    Графік збіжності GA; повертає Figure (для st.pyplot), нічого не показує сам.
+
+    Якщо є ga_instance.telemetry, додає середній фітнес і частку недопустимих рішень.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    telemetry = getattr(ga_instance, "telemetry", None)
+    if telemetry is not None and len(telemetry):
+        ax.plot(telemetry["generation"], telemetry["best"], linewidth=2, color='#2E86AB', label="Найкращий")
+        ax.plot(telemetry["generation"], telemetry["mean"], linewidth=1, color='#A23B72', alpha=0.7, label="Середній")
+        # Штрафи за бюджет тягнуть середнє на тисячі вниз; масштаб задаємо по найкращому
+        best_low, best_high = float(telemetry["best"].min()), float(telemetry["best"].max())
+        margin = max(best_high - best_low, 0.01 * abs(best_high), 1e-3)
+        ax.set_ylim(best_low - margin, best_high + 0.1 * margin)
+
+        ax_share = ax.twinx()
+        ax_share.plot(telemetry["generation"], telemetry["infeasible"], color='#F18F01', linestyle='--', label="Частка недопустимих")
+        ax_share.plot(telemetry["generation"], telemetry["diversity"], color='#6A994E', linestyle=':', label="Різноманіття")
+        ax_share.set_ylim(0, 1.05)
+        ax_share.set_ylabel("Частка популяції", fontsize=12)
+
+        lines = ax.get_lines() + ax_share.get_lines()
+        ax.legend(lines, [line.get_label() for line in lines], loc="lower right")
+    else:
+        ax.plot(ga_instance.best_solutions_fitness, linewidth=2, color='#2E86AB')
+    ax.set_xlabel("Покоління", fontsize=12, fontweight='bold')
+    ax.set_ylabel("QS Overall Score", fontsize=12, fontweight='bold')
+    ax.set_title("Динаміка покращення QS Score", fontsize=14, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
 def get_top_solutions(ga_instance, QS_INPUT, QS_COST, QS_WEIGHTS, top_n=10):
-    import numpy as np
-    scores = []
-    pop = np.asarray(ga_instance.population)
-    top_n = min(top_n, len(pop))
-    for sol in pop:
-        fitness = ga_instance.fitness_func(ga_instance, sol, 0)
-        ru = compute_total_ru(QS_INPUT, QS_COST, sol)
-        scores.append((fitness, ru, sol))
-
-    scores = sorted(scores, key=lambda x: x[0], reverse=True)[:top_n]
-
-    rows, contrib_rows = [], []
+    """
+    Топ-N унікальних рішень останньої популяції: (df, contrib_df).
+
+    Популяція декодується, дублікати на сітці кроків 0.1 відкидаються, а унікальні
+    рішення оцінюються однією матрицею за значеннями на сітці (без float-шуму генів).
+    Сортування - за фітнесом, округленим до 9 знаків (спадання), далі за RU (зростання),
+    тож рівні за QS рішення впорядковуються за витратами, як в optimize_qs_k_best.
+    """
     keys = list(QS_INPUT.keys())
-    for rank, (fitness, ru, sol) in enumerate(scores, 1):
-        row = {"#": rank, "QS Score": round(float(fitness), 4), "RU": round(float(ru), 2)}
-        row.update({k: round(float(v), 2) for k, v in zip(keys, sol)})
-        rows.append(row)
-
-        contrib = {k: float(sol[i]) * float(QS_WEIGHTS[k]) for i, k in enumerate(keys)}
-        contrib["#"] = rank
-        contrib_rows.append(contrib)
-
-    df = pd.DataFrame(rows)
-    contrib_df = pd.DataFrame(contrib_rows).set_index("#").astype(float)
-    contrib_df = contrib_df[keys]
+    inputs, weights, _, finite_costs = _fitness_arrays(QS_INPUT, QS_COST, QS_WEIGHTS)
+
+    genes = np.asarray(ga_instance.population)
+    X = np.atleast_2d(decode_population(ga_instance, genes))
+    steps = np.rint((X - inputs) / STEP).astype(np.int64)
+    _, unique_idx = np.unique(steps, axis=0, return_index=True)
+    genes, X = genes[unique_idx], inputs + STEP * steps[unique_idx]
+
+    problem = getattr(ga_instance, "qs_problem", None)
+    if problem is not None:
+        fitness = make_batch_fitness(QS_INPUT, QS_COST, QS_WEIGHTS, problem.max_ru)(ga_instance, X, None)
+    else:
+        fitness = np.array([ga_instance.fitness_func(ga_instance, g, 0) for g in genes], dtype=float)
+    ru = np.clip(X - inputs, 0.0, None) @ finite_costs
+
+    order = np.lexsort((ru, -np.round(fitness, 9)))[:min(top_n, len(X))]
+    ranks = np.arange(1, len(order) + 1)
+
+    df = pd.DataFrame({"#": ranks, "QS Score": np.round(fitness[order], 4), "RU": np.round(ru[order], 2)})
+    df[keys] = np.round(X[order], 2)
+    contrib_df = pd.DataFrame(X[order] * weights, columns=keys, index=pd.Index(ranks, name="#"))
     return df, contrib_df
 
 def save_experiment_to_session(algorithm, current_qs, qs_score, ru_used, execution_time, solution_details=None, comparison_metrics=None,
-                              improved_indicators=None, QS_INPUT=None, solution=None):
+                              improved_indicators=None, QS_INPUT=None, solution=None, telemetry=None):
     """
     Зберігає дані експерименту в сесії Streamlit
     
@@ -293,6 +1462,7 @@ def save_experiment_to_session(algorithm, current_qs, qs_score, ru_used, executi
         improved_indicators: Список покращених показників
         QS_INPUT: Початкові значення показників
         solution: Рішення (масив значень)
+        telemetry: Телеметрія GA по поколіннях (масив TELEMETRY_DTYPE)
     """
     import streamlit as st
     from datetime import datetime
@@ -331,7 +1501,9 @@ def save_experiment_to_session(algorithm, current_qs, qs_score, ru_used, executi
         "comparison_metrics": comparison_metrics or {},
         "improved_indicators": improved_indicators or [],
         "QS_INPUT": QS_INPUT,  # Зберігаємо початкові значення
-        "solution": solution_to_save   # Зберігаємо рішення (нові значення) як list
+        "solution": solution_to_save,  # Зберігаємо рішення (нові значення) як list
+        # Телеметрія як словник списків, щоб історію можна було серіалізувати
+        "telemetry": {name: telemetry[name].tolist() for name in telemetry.dtype.names} if telemetry is not None else None
     }
 
     st.session_state["experiments_data"].append(experiment)
@@ -363,4 +1535,5 @@ if __name__ == "__main__":
 
     print(f"\nQS Overall Score (2026): {qs_score:.2f}")
 
-    plot_progress(ga)
\ No newline at end of file
+    plot_progress(ga)
+    plt.show()
\ No newline at end of file
@@ -1,9 +1,145 @@
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pulp
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
+from problem import QSProblem, STEP, accepts_problem
+from utils.cache import get_cache, solution_key
 
 
-def optimize_qs_pulp(
+def _max_steps(
+    QS_INPUT: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    selected_indicators: List[str],
+) -> Dict[str, int]:
+    """Максимальна кількість кроків по 0.1 для кожного показника (0 для заморожених/необраних)."""
+    steps = {}
+    for k in QS_INPUT.keys():
+        # ефективне максимальне збільшення з урахуванням QS_DELTA та QS_MAX
+        max_inc = max(0.0, min(float(QS_DELTA.get(k, 0.0)), float(QS_MAX[k]) - float(QS_INPUT[k])))
+        max_steps = int(round(max_inc / STEP))
+
+        if (k in selected_indicators) and (max_steps > 0) and (QS_COST[k] < float("inf")):
+            steps[k] = max_steps
+        else:
+            steps[k] = 0
+    return steps
+
+
+def _build_result(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_COST: Dict[str, float],
+    steps: Dict[str, int],
+) -> Tuple[Dict[str, float], float, pd.DataFrame]:
+    """Перетворює кількість кроків у (x_2026, qs_score, df)."""
+    keys = list(QS_INPUT.keys())
+    deltas = {k: STEP * steps[k] for k in keys}
+    x_2026 = {k: float(QS_INPUT[k]) + float(deltas[k]) for k in keys}
+    qs_score = sum(x_2026[k] * float(QS_WEIGHTS[k]) for k in keys)
+
+    df = pd.DataFrame({
+        "Показник": keys,
+        "2025": [QS_INPUT[k] for k in keys],
+        "2026 (оптимізовано)": [x_2026[k] for k in keys],
+        "Приріст": [deltas[k] for k in keys],
+        "Витрати RU": [deltas[k] * QS_COST[k] if QS_COST[k] < float("inf") else 0 for k in keys]
+    })
+
+    return x_2026, float(qs_score), df
+
+
+def _cost_scale(step_costs: List[float], max_power: int = 6) -> int:
+    """Найменший множник 10^d, при якому вартості кроків стають цілими числами."""
+    for d in range(max_power + 1):
+        scale = 10 ** d
+        if all(abs(c * scale - round(c * scale)) < 1e-6 for c in step_costs):
+            return scale
+    raise ValueError("Вартості показників не зводяться до цілої сітки для DP-розв'язувача")
+
+
+def _knapsack_dp(
+    values: List[float],
+    weights: List[int],
+    upper: List[int],
+    capacity: int,
+    lower: List[int] | None = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Обмежений рюкзак за точною цілою вартістю.
+
+    Повертає (dp, choice): dp[c] - найкращий приріст цільової функції при витратах рівно c
+    (-inf якщо недосяжно), choice[i, c] - кількість кроків показника i у цьому стані.
+    Необов'язкові lower задають мінімальну кількість кроків для кожного показника.
+    """
+    if lower is None:
+        lower = [0] * len(values)
+
+    dp = np.full(capacity + 1, -np.inf)
+    dp[0] = 0.0
+    choice = np.zeros((len(values), capacity + 1), dtype=np.int32)
+
+    for i, (v, w, lo, hi) in enumerate(zip(values, weights, lower, upper)):
+        new = dp.copy() if lo == 0 else np.full(capacity + 1, -np.inf)
+        arg = choice[i]
+        for s in range(max(lo, 1), hi + 1):
+            shift = s * w
+            if shift > capacity:
+                break
+            cand = dp[:capacity + 1 - shift] + s * v
+            target = new[shift:]
+            better = cand > target + 1e-12
+            target[better] = cand[better]
+            arg[shift:][better] = s
+        dp = new
+
+    return dp, choice
+
+
+def _backtrack(choice: np.ndarray, weights: List[int], c: int) -> List[int]:
+    steps = [0] * len(weights)
+    for i in range(len(weights) - 1, -1, -1):
+        s = int(choice[i, c])
+        steps[i] = s
+        c -= s * weights[i]
+    return steps
+
+
+def _prepare_dp(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None,
+):
+    """Параметри рюкзака для DP: активні показники, цілі ваги, приріст за крок, межі, масштаб, місткість."""
+    keys = list(QS_INPUT.keys())
+    if selected_indicators is None:
+        selected_indicators = keys
+
+    max_steps = _max_steps(QS_INPUT, QS_MAX, QS_DELTA, QS_COST, selected_indicators)
+    active = [k for k in keys if max_steps[k] > 0]
+    if not active or float(MAX_RU) < 0:
+        return active, [], [], [], 1, 0
+
+    scale = _cost_scale([float(QS_COST[k]) * STEP for k in active])
+    weights = [int(round(float(QS_COST[k]) * STEP * scale)) for k in active]
+    values = [float(QS_WEIGHTS[k]) * STEP for k in active]
+    upper = [max_steps[k] for k in active]
+
+    # Бюджет понад сумарну вартість усіх кроків нічого не додає
+    capacity = min(int(np.floor(float(MAX_RU) * scale + 1e-6)), sum(w * u for w, u in zip(weights, upper)))
+    return active, weights, values, upper, scale, capacity
+
+
+@accepts_problem
+def optimize_qs_dp(
     QS_INPUT: Dict[str, float],
     QS_WEIGHTS: Dict[str, float],
     QS_MAX: Dict[str, float],
@@ -12,6 +148,490 @@ def optimize_qs_pulp(
     MAX_RU: float,
     selected_indicators: List[str] | None = None,
 ) -> Tuple[Dict[str, float], float, pd.DataFrame]:
+    """
+    Точний розв'язок тієї ж задачі, що й optimize_qs_pulp, динамічним програмуванням.
+
+    Задача - обмежений рюкзак з одним бюджетним обмеженням: вартість кроку
+    QS_COST[k] * 0.1 масштабується до цілої сітки, після чого DP по витратах
+    знаходить оптимум без зовнішнього процесу CBC. Серед рівних за QS Score
+    рішень обирається найдешевше.
+    """
+    active, weights, values, upper, scale, capacity = _prepare_dp(
+        QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators
+    )
+
+    steps = {k: 0 for k in QS_INPUT.keys()}
+    if active and weights:
+        dp, choice = _knapsack_dp(values, weights, upper, capacity)
+
+        best = dp.max()
+        c_best = int(np.flatnonzero(dp >= best - 1e-9)[0])
+        for k, s in zip(active, _backtrack(choice, weights, c_best)):
+            steps[k] = s
+
+    return _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, steps)
+
+
+@accepts_problem
+def optimize_qs_frontier(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+    step_ru: float = STEP,
+    breakpoints_only: bool = False,
+) -> pd.DataFrame:
+    """
+    Оптимальна крива QS Score від бюджету для всіх бюджетів від 0 до MAX_RU за один прохід DP.
+
+    Таблиця DP для бюджету MAX_RU вже містить найкращий результат для кожної меншої
+    вартості, тож оптимум для будь-якого бюджету - це пошук, а не новий розв'язок.
+
+    Повертає DataFrame з колонками "Бюджет RU", "QS Score", "Витрати RU" та оптимальними
+    значеннями показників. breakpoints_only=True залишає лише бюджети, на яких оптимум змінюється;
+    інакше - сітка з кроком step_ru.
+    """
+    keys = list(QS_INPUT.keys())
+    active, weights, values, upper, scale, capacity = _prepare_dp(
+        QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators
+    )
+
+    if active and weights:
+        dp, choice = _knapsack_dp(values, weights, upper, capacity)
+        running = np.maximum.accumulate(dp)
+        # Точки зламу: вартості, на яких найкращий результат строго зростає
+        breakpoints = np.flatnonzero(np.r_[True, dp[1:] > running[:-1] + 1e-9])
+    else:
+        choice, breakpoints = None, np.array([0])
+
+    if breakpoints_only:
+        budgets = breakpoints / scale
+    else:
+        budgets = np.round(np.arange(0.0, float(MAX_RU) + 1e-9, step_ru), 10)
+
+    rows = []
+    allocations = {}
+    for budget in budgets:
+        c = min(int(np.floor(budget * scale + 1e-6)), capacity)
+        c_best = int(breakpoints[np.searchsorted(breakpoints, c, side="right") - 1])
+
+        if c_best not in allocations:
+            steps = {k: 0 for k in keys}
+            if choice is not None:
+                for k, s in zip(active, _backtrack(choice, weights, c_best)):
+                    steps[k] = s
+            x_2026, qs_score, df = _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, steps)
+            allocations[c_best] = (x_2026, qs_score, float(df["Витрати RU"].sum()))
+
+        x_2026, qs_score, ru_used = allocations[c_best]
+        row = {"Бюджет RU": float(budget), "QS Score": qs_score, "Витрати RU": ru_used}
+        row.update({k: x_2026[k] for k in keys})
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+@accepts_problem
+def optimize_qs_k_best(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+    top_n: int = 10,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    top_n найкращих різних розподілів, упорядкованих за QS Score (спадання), потім за RU (зростання).
+
+    Розбиття простору рішень за Лоулером: після кожного знайденого розв'язку x простір,
+    що залишився, ділиться на підзадачі "перші i показників як у x, i-й - менше або більше
+    ніж у x", кожна з яких розв'язується тим самим DP з нижніми та верхніми межами.
+    Результат детермінований і має формат get_top_solutions: (df, contrib_df);
+    при від'ємному бюджеті допустимих розподілів немає і обидві таблиці порожні.
+    """
+    keys = list(QS_INPUT.keys())
+    active, weights, values, upper, scale, capacity = _prepare_dp(
+        QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators
+    )
+
+    def solve(lower, upper):
+        if float(MAX_RU) < 0:
+            return None
+        if not weights:
+            return 0.0, 0, []
+        if sum(lo * w for lo, w in zip(lower, weights)) > capacity:
+            return None
+        dp, choice = _knapsack_dp(values, weights, upper, capacity, lower)
+        best = dp.max()
+        if best == -np.inf:
+            return None
+        c_best = int(np.flatnonzero(dp >= best - 1e-9)[0])
+        return float(best), c_best, _backtrack(choice, weights, c_best)
+
+    heap = []
+    counter = 0
+    first = solve([0] * len(active), list(upper))
+    if first is not None:
+        heapq.heappush(heap, (-round(first[0], 9), first[1], counter, [0] * len(active), list(upper), first[2]))
+
+    found = []
+    while heap and len(found) < top_n:
+        _, _, _, lower_b, upper_b, steps = heapq.heappop(heap)
+        found.append(steps)
+
+        # Ділимо підпростір (lower_b, upper_b) без знайденого розв'язку steps
+        fixed_lower, fixed_upper = list(lower_b), list(upper_b)
+        for i in range(len(active)):
+            for lo, hi in ((fixed_lower[i], steps[i] - 1), (steps[i] + 1, fixed_upper[i])):
+                if lo > hi:
+                    continue
+                sub_lower, sub_upper = list(fixed_lower), list(fixed_upper)
+                sub_lower[i], sub_upper[i] = lo, hi
+                sub = solve(sub_lower, sub_upper)
+                if sub is not None:
+                    counter += 1
+                    heapq.heappush(heap, (-round(sub[0], 9), sub[1], counter, sub_lower, sub_upper, sub[2]))
+            fixed_lower[i] = fixed_upper[i] = steps[i]
+
+    rows, contrib_rows = [], []
+    for rank, active_steps in enumerate(found, 1):
+        steps = {k: 0 for k in keys}
+        steps.update(zip(active, active_steps))
+        x_2026, qs_score, df = _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, steps)
+
+        row = {"#": rank, "QS Score": round(float(qs_score), 4), "RU": round(float(df["Витрати RU"].sum()), 2)}
+        row.update({k: round(float(x_2026[k]), 2) for k in keys})
+        rows.append(row)
+
+        contrib = {k: float(x_2026[k]) * float(QS_WEIGHTS[k]) for k in keys}
+        contrib["#"] = rank
+        contrib_rows.append(contrib)
+
+    df = pd.DataFrame(rows, columns=["#", "QS Score", "RU"] + keys)
+    contrib_df = pd.DataFrame(contrib_rows, columns=keys + ["#"]).set_index("#").astype(float)
+    contrib_df = contrib_df[keys]
+    return df, contrib_df
+
+
+class QSModel:
+    """
+    Скомпільована PuLP-модель QS оптимізації, яка будується один раз на набір параметрів.
+
+    Змінні, цільова функція та бюджетне обмеження створюються в конструкторі;
+    set_budget, set_caps та set_selected лише змінюють межі змінних і праву частину
+    обмеження, а solve розв'язує модель з теплим стартом від попереднього розв'язку.
+    """
+
+    def __init__(
+        self,
+        QS_INPUT: Dict[str, float],
+        QS_WEIGHTS: Dict[str, float],
+        QS_MAX: Dict[str, float],
+        QS_DELTA: Dict[str, float],
+        QS_COST: Dict[str, float],
+        MAX_RU: float,
+        selected_indicators: List[str] | None = None,
+    ):
+        self.QS_INPUT = QS_INPUT
+        self.QS_WEIGHTS = QS_WEIGHTS
+        self.QS_MAX = QS_MAX
+        self.QS_DELTA = dict(QS_DELTA)
+        self.QS_COST = QS_COST
+        self.keys = list(QS_INPUT.keys())
+        self.selected = list(selected_indicators) if selected_indicators is not None else list(self.keys)
+        self.MAX_RU = float(MAX_RU)
+
+        self.model = pulp.LpProblem("QS_Optimization", pulp.LpMaximize)
+        self.k_vars: Dict[str, pulp.LpVariable] = {
+            k: pulp.LpVariable(f"k_{k}", lowBound=0, upBound=0, cat="Integer") for k in self.keys
+        }
+
+        # Цільова функція
+        self.model += pulp.lpSum([
+            float(QS_WEIGHTS[k]) * (float(QS_INPUT[k]) + STEP * self.k_vars[k]) for k in self.keys
+        ])
+
+        # Обмеження бюджету RU
+        self.model += (pulp.lpSum([
+            float(QS_COST[k]) * STEP * self.k_vars[k] for k in self.keys if QS_COST[k] < float("inf")
+        ]) <= float(MAX_RU), "budget")
+
+        self._has_solution = False
+        self._update_bounds()
+
+    @classmethod
+    def from_problem(cls, problem: QSProblem, selected_indicators: List[str] | None = None) -> "QSModel":
+        return cls(*problem.unpack(), selected_indicators)
+
+    def _update_bounds(self):
+        max_steps = _max_steps(self.QS_INPUT, self.QS_MAX, self.QS_DELTA, self.QS_COST, self.selected)
+        for k in self.keys:
+            self.k_vars[k].upBound = max_steps[k]
+
+    def set_budget(self, MAX_RU: float):
+        """Змінює бюджет RU без перебудови моделі."""
+        self.MAX_RU = float(MAX_RU)
+        self.model.constraints["budget"].constant = -float(MAX_RU)
+
+    def set_caps(self, QS_DELTA: Dict[str, float]):
+        """Змінює максимальні прирости показників (QS_DELTA) для наступного розв'язку."""
+        self.QS_DELTA.update(QS_DELTA)
+        self._update_bounds()
+
+    def set_selected(self, selected_indicators: List[str] | None):
+        """Змінює набір показників, які дозволено покращувати."""
+        self.selected = list(selected_indicators) if selected_indicators is not None else list(self.keys)
+        self._update_bounds()
+
+    def solve(self, warm_start: bool = True, solver=None) -> Tuple[Dict[str, float], float, pd.DataFrame]:
+        """
+        Розв'язує модель і повертає (x_2026, qs_score, df) як optimize_qs_pulp.
+
+        solver - необов'язковий екземпляр розв'язувача PuLP (за замовчуванням CBC).
+        Від'ємний бюджет дає нульовий розподіл, як optimize_qs_dp: модель недопустима,
+        і розв'язувач повернув би довільні значення змінних.
+        """
+        if self.MAX_RU < 0:
+            return _build_result(self.QS_INPUT, self.QS_WEIGHTS, self.QS_COST, {k: 0 for k in self.keys})
+
+        use_warm_start = warm_start and self._has_solution
+        if use_warm_start:
+            # Попередній розв'язок, обрізаний до нових меж, як початкова точка для CBC
+            for var in self.k_vars.values():
+                prev = int(round(var.value() or 0))
+                var.setInitialValue(min(prev, int(var.upBound)))
+
+        if solver is None:
+            solver = pulp.PULP_CBC_CMD(msg=0, warmStart=use_warm_start)
+        self.model.solve(solver)
+        self._has_solution = True
+
+        steps = {k: int(round(pulp.value(self.k_vars[k]) or 0)) for k in self.keys}
+        return _build_result(self.QS_INPUT, self.QS_WEIGHTS, self.QS_COST, steps)
+
+
+# === Реєстр розв'язувачів === #
+SOLVER_BACKENDS: Dict[str, Callable[..., Tuple[Dict[str, float], float, pd.DataFrame]]] = {}
+
+# Максимальний розмір таблиці DP (показники x місткість), за якого auto обирає DP
+DP_MAX_CELLS = 5_000_000
+
+
+def register_backend(name: str):
+    """Декоратор, що реєструє розв'язувач з сигнатурою optimize_qs_dp під назвою name."""
+    def decorator(fn):
+        SOLVER_BACKENDS[name] = fn
+        return fn
+    return decorator
+
+
+def _highs_solver():
+    """Доступний розв'язувач HiGHS у PuLP (highspy або бінарний highs) або None."""
+    for solver_cls in (getattr(pulp, "HiGHS", None), getattr(pulp, "HiGHS_CMD", None)):
+        if solver_cls is None:
+            continue
+        solver = solver_cls(msg=False)
+        if solver.available():
+            return solver
+    return None
+
+
+def available_backends() -> List[str]:
+    """Назви зареєстрованих розв'язувачів, які можна запустити в поточному середовищі."""
+    return [name for name in SOLVER_BACKENDS if name != "highs" or _highs_solver() is not None]
+
+
+@register_backend("cbc")
+def _solve_cbc(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators=None):
+    return QSModel(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators).solve()
+
+
+@register_backend("highs")
+def _solve_highs(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators=None):
+    solver = _highs_solver()
+    if solver is None:
+        raise RuntimeError("HiGHS недоступний: встановіть highspy")
+    model = QSModel(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators)
+    return model.solve(solver=solver)
+
+
+register_backend("dp")(optimize_qs_dp)
+
+
+@register_backend("greedy")
+@accepts_problem
+def optimize_qs_greedy(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+) -> Tuple[Dict[str, float], float, pd.DataFrame]:
+    """
+    Жадібний розв'язок за спаданням QS на одиницю RU (не гарантує оптимум).
+
+    Показники заповнюються цілими кроками у порядку ефективності; дробовий залишок
+    бюджету дає верхню межу релаксації (дробовий рюкзак), яка зберігається в
+    df.attrs["upper_bound"] - справжній оптимум не перевищує її. Від'ємний бюджет дає
+    нульовий розподіл, як optimize_qs_dp.
+    """
+    keys = list(QS_INPUT.keys())
+    if selected_indicators is None:
+        selected_indicators = keys
+    if float(MAX_RU) < 0:
+        x_2026, qs_score, df = _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, {k: 0 for k in keys})
+        df.attrs["upper_bound"] = qs_score
+        return x_2026, qs_score, df
+    max_steps = _max_steps(QS_INPUT, QS_MAX, QS_DELTA, QS_COST, selected_indicators)
+
+    def efficiency(k):
+        cost = float(QS_COST[k])
+        return float("inf") if cost == 0 else float(QS_WEIGHTS[k]) / cost
+
+    steps = {k: 0 for k in keys}
+    remaining = float(MAX_RU)
+    bound = sum(float(QS_WEIGHTS[k]) * float(QS_INPUT[k]) for k in keys)
+    fractional_open = True
+    for k in sorted([k for k in keys if max_steps[k] > 0], key=efficiency, reverse=True):
+        step_cost = float(QS_COST[k]) * STEP
+        step_value = float(QS_WEIGHTS[k]) * STEP
+        take = max_steps[k] if step_cost == 0 else max(0, min(max_steps[k], int(np.floor(remaining / step_cost + 1e-9))))
+        steps[k] = take
+        remaining -= take * step_cost
+
+        if fractional_open:
+            fraction = max_steps[k] if step_cost == 0 else min(float(max_steps[k]), max(remaining, 0.0) / step_cost + take)
+            bound += step_value * fraction
+            fractional_open = fraction >= max_steps[k]
+
+    x_2026, qs_score, df = _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, steps)
+    df.attrs["upper_bound"] = float(bound)
+    return x_2026, qs_score, df
+
+
+@accepts_problem
+def sensitivity_report(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+) -> Dict:
+    """
+    Аналіз чутливості LP-релаксації задачі (дробовий рюкзак) за один прохід.
+
+    Релаксація з одним бюджетним обмеженням розв'язується сортуванням за QS на одиницю RU,
+    тож усі двоїсті величини отримуються без повторних розв'язків:
+        * shadow_price - приріст QS Score за додатковий 1 RU (ефективність критичного показника);
+        * budget_range - діапазон бюджету, в якому shadow_price незмінна;
+        * table - для кожного показника QS за RU, редукована вартість w_k - shadow_price * cost_k,
+          статус у релаксації та діапазон ваги, в якому поточний розподіл залишається оптимальним.
+    Для цілочисельної задачі це оцінки: справжній приріст змінюється кроками по 0.1.
+    """
+    keys = list(QS_INPUT.keys())
+    if selected_indicators is None:
+        selected_indicators = keys
+    max_steps = _max_steps(QS_INPUT, QS_MAX, QS_DELTA, QS_COST, selected_indicators)
+    active = [k for k in keys if max_steps[k] > 0]
+
+    def efficiency(k):
+        cost = float(QS_COST[k])
+        return float("inf") if cost == 0 else float(QS_WEIGHTS[k]) / cost
+
+    order = sorted(active, key=efficiency, reverse=True)
+    full_cost = {k: float(QS_COST[k]) * STEP * max_steps[k] for k in active}
+
+    # Критичний показник - перший, на який не вистачає бюджету повністю
+    spent, critical = 0.0, None
+    for k in order:
+        if spent + full_cost[k] > float(MAX_RU) + 1e-9:
+            critical = k
+            break
+        spent += full_cost[k]
+
+    if critical is None:
+        shadow_price = 0.0
+        budget_range = (spent, float("inf"))
+    else:
+        shadow_price = efficiency(critical)
+        budget_range = (spent, spent + full_cost[critical])
+
+    rows = []
+    for k in keys:
+        row = {"Показник": k, "QS за RU": np.nan, "Редукована вартість": np.nan,
+               "Статус": "заморожено", "Вага від": np.nan, "Вага до": np.nan}
+        if k in active:
+            cost = float(QS_COST[k])
+            row["QS за RU"] = efficiency(k)
+            row["Редукована вартість"] = float(QS_WEIGHTS[k]) - shadow_price * cost
+            if k == critical:
+                idx = order.index(k)
+                above = [efficiency(j) for j in order[:idx] if float(QS_COST[j]) > 0]
+                below = [efficiency(j) for j in order[idx + 1:]]
+                row["Статус"] = "частково"
+                row["Вага від"] = (below[0] if below else 0.0) * cost
+                row["Вага до"] = (above[-1] if above else float("inf")) * cost
+            elif critical is None or order.index(k) < order.index(critical):
+                row["Статус"] = "на максимумі"
+                row["Вага від"] = shadow_price * cost
+                row["Вага до"] = float("inf")
+            else:
+                row["Статус"] = "не фінансується"
+                row["Вага від"] = float("-inf")
+                row["Вага до"] = shadow_price * cost
+        rows.append(row)
+
+    return {
+        "shadow_price": shadow_price,
+        "critical": critical,
+        "budget_range": budget_range,
+        "table": pd.DataFrame(rows),
+    }
+
+
+@accepts_problem
+def select_backend(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+) -> str:
+    """Найшвидший точний розв'язувач для задачі: DP, якщо таблиця невелика, інакше HiGHS або CBC."""
+    try:
+        active, _, _, _, _, capacity = _prepare_dp(
+            QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators
+        )
+        if len(active) * (capacity + 1) <= DP_MAX_CELLS:
+            return "dp"
+    except ValueError:
+        pass
+    return "highs" if _highs_solver() is not None else "cbc"
+
+
+@accepts_problem
+def optimize_qs_pulp(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: List[str] | None = None,
+    solver: str = "cbc",
+    sensitivity: bool = False,
+) -> Tuple:
     """
     Вирішує дискретну лінійну оптимізацію QS оцінки використовуючи Pulp.
 
@@ -22,50 +642,216 @@ def optimize_qs_pulp(
         * sum_k QS_COST[k] * (0.1 * k_k) <= MAX_RU (тільки для скінченних вартостей)
         * якщо k не обрано -> k_k = 0
         * якщо QS_COST[k] == inf -> k_k = 0 (заморожено)
+
+    solver - назва розв'язувача з SOLVER_BACKENDS ("cbc", "highs", "dp", "greedy")
+    або "auto" для автоматичного вибору найшвидшого точного методу.
+    Назва розв'язувача та час розв'язання зберігаються в df.attrs["backend"] та df.attrs["solve_time"];
+    Повертає (x_2026, qs_score, df); sensitivity=True додає четвертим елементом звіт
+    sensitivity_report: (x_2026, qs_score, df, sensitivity). Звіт не кладеться в df.attrs -
+    pandas порівнює attrs при merge/concat, а DataFrame у них ламає це порівняння.
     """
 
+    if solver == "auto":
+        solver = select_backend(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators)
+    if solver not in SOLVER_BACKENDS:
+        raise ValueError(f"Невідомий розв'язувач: {solver}. Доступні: {', '.join(SOLVER_BACKENDS)}")
+
+    start_time = time.perf_counter()
+    x_2026, qs_score, df = SOLVER_BACKENDS[solver](
+        QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators
+    )
+    df.attrs["backend"] = solver
+    df.attrs["solve_time"] = time.perf_counter() - start_time
+    if sensitivity:
+        report = sensitivity_report(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, selected_indicators)
+        return x_2026, qs_score, df, report
+    return x_2026, qs_score, df
+
+
+@accepts_problem
+def optimize_qs_top_n_pulp(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    num_indicators: int,
+    top_k: int = 10,
+    selected_indicators: List[str] | None = None,
+) -> List[Dict]:
+    """
+    Найкращі стратегії з не більше ніж num_indicators покращеними показниками одним MILP.
+
+    Замість перебору всіх комбінацій додаються бінарні змінні вибору y_k:
+        * y_k <= k_k <= max_steps_k * y_k (показник обрано <=> він покращується)
+        * sum_k y_k <= num_indicators
+    Після кожного розв'язку додається no-good обмеження, що виключає саме цей набір
+    показників, тож top_k розв'язків - це top_k різних стратегій у порядку спадання QS Score.
+
+    Повертає список словників з ключами combo, x_2026, qs_score, ru.
+    """
     keys = list(QS_INPUT.keys())
     if selected_indicators is None:
         selected_indicators = keys
 
-    model = pulp.LpProblem("QS_Optimization", pulp.LpMaximize)
+    max_steps = _max_steps(QS_INPUT, QS_MAX, QS_DELTA, QS_COST, selected_indicators)
+    active = [k for k in keys if max_steps[k] > 0]
 
-    k_vars: Dict[str, pulp.LpVariable] = {}
-    for k in keys:
-        # ефективне максимальне збільшення з урахуванням QS_DELTA та QS_MAX
-        max_inc = max(0.0, min(float(QS_DELTA.get(k, 0.0)), float(QS_MAX[k]) - float(QS_INPUT[k])))
-        max_steps = int(round(max_inc / 0.1))
+    model = pulp.LpProblem("QS_TopN_Optimization", pulp.LpMaximize)
+    k_vars = {k: pulp.LpVariable(f"k_{k}", lowBound=0, upBound=max_steps[k], cat="Integer") for k in active}
+    y_vars = {k: pulp.LpVariable(f"y_{k}", cat="Binary") for k in active}
 
-        if (k in selected_indicators) and (max_steps > 0) and (QS_COST[k] < float("inf")):
-            k_vars[k] = pulp.LpVariable(f"k_{k}", lowBound=0, upBound=max_steps, cat="Integer")
-        else:
-            k_vars[k] = pulp.LpVariable(f"k_{k}", lowBound=0, upBound=0, cat="Integer")
+    model += pulp.lpSum([float(QS_WEIGHTS[k]) * STEP * k_vars[k] for k in active])
+    model += pulp.lpSum([float(QS_COST[k]) * STEP * k_vars[k] for k in active]) <= float(MAX_RU)
+    model += pulp.lpSum(y_vars.values()) <= int(num_indicators)
+    for k in active:
+        model += k_vars[k] <= max_steps[k] * y_vars[k]
+        model += k_vars[k] >= y_vars[k]
 
-    # Цільова функція
-    model += pulp.lpSum([
-        float(QS_WEIGHTS[k]) * (float(QS_INPUT[k]) + 0.1 * k_vars[k]) for k in keys
-    ])
+    results = []
+    for _ in range(top_k):
+        status = model.solve(pulp.PULP_CBC_CMD(msg=0))
+        if pulp.LpStatus[status] != "Optimal":
+            break
 
-    # Обмеження бюджету RU
-    model += pulp.lpSum([
-        float(QS_COST[k]) * 0.1 * k_vars[k] for k in keys if QS_COST[k] < float("inf")
-    ]) <= float(MAX_RU)
+        steps = {k: 0 for k in keys}
+        for k in active:
+            steps[k] = int(round(pulp.value(k_vars[k]) or 0))
+        used = [k for k in active if steps[k] > 0]
 
-    model.solve(pulp.PULP_CBC_CMD(msg=0))
+        x_2026, qs_score, df = _build_result(QS_INPUT, QS_WEIGHTS, QS_COST, steps)
+        results.append({
+            "combo": tuple(used),
+            "x_2026": x_2026,
+            "qs_score": qs_score,
+            "ru": float(df["Витрати RU"].sum()),
+        })
 
-    deltas = {k: 0.1 * pulp.value(k_vars[k]) for k in keys}
-    x_2026 = {k: float(QS_INPUT[k]) + float(deltas[k]) for k in keys}
-    qs_score = sum(x_2026[k] * float(QS_WEIGHTS[k]) for k in keys)
+        # Виключаємо рівно цей набір показників
+        model += (
+            pulp.lpSum([y_vars[k] for k in used])
+            - pulp.lpSum([y_vars[k] for k in active if k not in used])
+            <= len(used) - 1
+        )
 
-    df = pd.DataFrame({
-        "Показник": keys,
-        "2025": [QS_INPUT[k] for k in keys],
-        "2026 (оптимізовано)": [x_2026[k] for k in keys],
-        "Приріст": [deltas[k] for k in keys],
-        "Витрати RU": [deltas[k] * QS_COST[k] if QS_COST[k] < float("inf") else 0 for k in keys]
-    })
+    return results
+
+# === Пакетний розрахунок сценаріїв === #
+SCENARIO_DICT_FIELDS = ("QS_INPUT", "QS_WEIGHTS", "QS_MAX", "QS_DELTA", "QS_COST")
+
+
+def _scenario_params(base: Dict, overrides: Dict) -> Dict:
+    """
+    Повні параметри сценарію: базові словники, перекриті значеннями зі сценарію.
+
+    Невідома колонка (помилка в назві поля чи показник, якого немає в QS_INPUT) дає
+    ValueError, а не мовчки повертає базовий розв'язок.
+    """
+    params = {field: (dict(base[field]) if isinstance(base[field], dict) else base[field]) for field in base}
+    indicators = set(base["QS_INPUT"].keys())
+
+    def check_indicators(names, column):
+        unknown = [k for k in names if k not in indicators]
+        if unknown:
+            raise ValueError(f"Колонка сценарію '{column}': невідомі показники {', '.join(map(str, unknown))}")
+
+    for name, value in overrides.items():
+        if name in SCENARIO_DICT_FIELDS:
+            check_indicators(value.keys(), name)
+            params[name].update(value)
+        elif "." in name and name.split(".", 1)[0] in SCENARIO_DICT_FIELDS:
+            field, key = name.split(".", 1)
+            check_indicators([key], name)
+            params[field][key] = float(value)
+        elif name == "MAX_RU":
+            params["MAX_RU"] = float(value)
+        elif name == "selected_indicators":
+            if value is not None:
+                params["selected_indicators"] = [k.strip() for k in value.split(",")] if isinstance(value, str) else list(value)
+                check_indicators(params["selected_indicators"], name)
+        elif name != "Сценарій":
+            raise ValueError(f"Невідома колонка сценарію '{name}'")
+    return params
+
+
+def _solve_scenario(args):
+    """Розв'язує один сценарій у процесі-воркері (функція верхнього рівня для pickle)."""
+    params, solver = args
+    return optimize_qs_pulp(solver=solver, **params)
+
+
+@accepts_problem
+def optimize_qs_batch(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    scenarios,
+    solver: str = "auto",
+    max_workers: int | None = None,
+    chunksize: int = 16,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Розв'язує багато what-if сценаріїв однією таблицею.
+
+    scenarios - список словників або DataFrame; кожен сценарій перекриває базові параметри:
+        * "MAX_RU" - бюджет, "selected_indicators" - список або рядок "AR,ER";
+        * "QS_COST.AR", "QS_DELTA.CPF", ... - окремі значення (колонки DataFrame);
+        * "QS_COST": {...} - цілі словники; "Сценарій" - назва рядка.
+    Сценарії, які вже є в кеші розв'язків, не розв'язуються повторно; решта
+    розподіляється пакетами по chunksize між процесами пулу.
+    """
+    if isinstance(scenarios, pd.DataFrame):
+        scenarios = [
+            {name: value for name, value in row.items() if not (np.isscalar(value) and pd.isna(value))}
+            for row in scenarios.to_dict(orient="records")
+        ]
+
+    base = {
+        "QS_INPUT": QS_INPUT, "QS_WEIGHTS": QS_WEIGHTS, "QS_MAX": QS_MAX,
+        "QS_DELTA": QS_DELTA, "QS_COST": QS_COST, "MAX_RU": MAX_RU,
+        "selected_indicators": None,
+    }
+    all_params = [_scenario_params(base, scenario) for scenario in scenarios]
+
+    cache = get_cache() if use_cache else None
+    cache_keys = [solution_key(algorithm="LP", solver=solver, **params) for params in all_params]
+    results = [cache.get(key) if cache is not None else None for key in cache_keys]
+    from_cache = [result is not None for result in results]
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        tasks = [(all_params[i], solver) for i in pending]
+        if max_workers == 1 or len(tasks) < 2 * chunksize:
+            # Для невеликих пакетів запуск пулу процесів дорожчий за сам розрахунок
+            solved = [_solve_scenario(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                solved = list(executor.map(_solve_scenario, tasks, chunksize=chunksize))
+        for i, result in zip(pending, solved):
+            results[i] = result
+            if cache is not None:
+                cache.set(cache_keys[i], result)
+
+    rows = []
+    for i, (scenario, params, (x_2026, qs_score, df)) in enumerate(zip(scenarios, all_params, results)):
+        row = {
+            "Сценарій": scenario.get("Сценарій", i + 1),
+            "MAX_RU": params["MAX_RU"],
+            "QS Score": qs_score,
+            "Витрати RU": float(df["Витрати RU"].sum()),
+            "Розв'язувач": df.attrs.get("backend"),
+            "З кешу": from_cache[i],
+        }
+        row.update({k: x_2026[k] for k in params["QS_INPUT"].keys()})
+        rows.append(row)
+
+    return pd.DataFrame(rows)
 
-    return x_2026, float(qs_score), df
 
 if __name__ == "__main__":
     QS_INPUT = {
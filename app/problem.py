@@ -0,0 +1,149 @@
+import functools
+import inspect
+import numpy as np
+from typing import Dict, Tuple
+
+STEP = 0.1
+
+# Назви параметрів задачі у сигнатурах оптимізаторів
+PROBLEM_FIELDS = ("QS_INPUT", "QS_WEIGHTS", "QS_MAX", "QS_DELTA", "QS_COST", "MAX_RU")
+
+
+class QSProblem:
+    """
+    Компактне представлення задачі QS оптимізації на масивах NumPy.
+
+    Порядок показників фіксується в keys, тож будь-яке рішення - це вектор (або матриця
+    популяції) значень у цьому порядку. score, ru та feasible векторизовані й приймають
+    як один вектор, так і матрицю рішень.
+    """
+
+    __slots__ = (
+        "keys", "inputs", "weights", "maxima", "deltas", "costs",
+        "finite_costs", "caps", "max_steps", "frozen", "max_ru",
+    )
+
+    def __init__(self, keys, inputs, weights, maxima, deltas, costs, max_ru):
+        self.keys = tuple(keys)
+        self.inputs = np.asarray(inputs, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.maxima = np.asarray(maxima, dtype=float)
+        self.deltas = np.asarray(deltas, dtype=float)
+        self.costs = np.asarray(costs, dtype=float)
+        self.max_ru = float(max_ru)
+
+        # Вартість для підрахунку RU: нескінченні вартості не враховуються (показник заморожений)
+        self.finite_costs = np.where(np.isinf(self.costs), 0.0, self.costs)
+        max_inc = np.maximum(0.0, np.minimum(self.deltas, self.maxima - self.inputs))
+        steps = np.rint(max_inc / STEP).astype(np.int64)
+        self.frozen = np.isinf(self.costs) | (steps == 0)
+        self.max_steps = np.where(self.frozen, 0, steps)
+        self.caps = self.inputs + STEP * self.max_steps
+
+    @classmethod
+    def from_dicts(cls, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU) -> "QSProblem":
+        keys = list(QS_INPUT.keys())
+        return cls(
+            keys,
+            [float(QS_INPUT[k]) for k in keys],
+            [float(QS_WEIGHTS[k]) for k in keys],
+            [float(QS_MAX[k]) for k in keys],
+            [float(QS_DELTA.get(k, 0.0)) for k in keys],
+            [float(QS_COST[k]) for k in keys],
+            MAX_RU,
+        )
+
+    def unpack(self) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, float], Dict[str, float], Dict[str, float], float]:
+        """Повертає (QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU) як словники."""
+        def as_dict(values):
+            return {k: float(v) for k, v in zip(self.keys, values)}
+        return (
+            as_dict(self.inputs), as_dict(self.weights), as_dict(self.maxima),
+            as_dict(self.deltas), as_dict(self.costs), self.max_ru,
+        )
+
+    @property
+    def num_genes(self) -> int:
+        return len(self.keys)
+
+    @property
+    def current_score(self) -> float:
+        return float(self.inputs @ self.weights)
+
+    def score(self, x):
+        """QS Score рішення (вектор) або кожного рядка матриці рішень."""
+        return np.asarray(x, dtype=float) @ self.weights
+
+    def ru(self, x):
+        """Витрати RU: додатні прирости на скінченні вартості."""
+        increase = np.clip(np.asarray(x, dtype=float) - self.inputs, 0.0, None)
+        return increase @ self.finite_costs
+
+    def feasible(self, x, tol: float = 1e-9):
+        """Рішення в межах [inputs, caps], заморожені показники без змін і бюджет не перевищено."""
+        x = np.asarray(x, dtype=float)
+        in_bounds = np.all((x >= self.inputs - tol) & (x <= self.caps + tol), axis=-1)
+        return in_bounds & (self.ru(x) <= self.max_ru + tol)
+
+    def repair(self, x):
+        """
+        Проєктує рішення (або матрицю рішень) на допустиму множину.
+
+        Значення обрізаються до [inputs, caps] і сітки кроку 0.1, заморожені показники
+        повертаються до поточних. Якщо бюджет перевищено, прирости знімаються починаючи
+        з показників з найменшою ефективністю (вага / вартість) до виконання обмеження.
+        """
+        x = np.asarray(x, dtype=float)
+        steps = np.clip(self.to_steps(x), 0, self.max_steps)
+
+        step_cost = STEP * self.finite_costs
+        efficiency = np.divide(self.weights, step_cost, out=np.full_like(step_cost, np.inf), where=step_cost > 0)
+        order = np.argsort(efficiency, kind="stable")
+
+        spent = steps[..., order] * step_cost[order]
+        excess = np.clip(spent.sum(axis=-1) - self.max_ru, 0.0, None)
+        # Скільки RU зняти з кожного показника: спершу з найменш ефективних
+        before = np.cumsum(spent, axis=-1) - spent
+        cut = np.clip(excess[..., None] - before, 0.0, spent)
+        removed = np.ceil(np.divide(cut, step_cost[order], out=np.zeros_like(cut), where=step_cost[order] > 0) - 1e-9)
+
+        repaired = steps.copy()
+        repaired[..., order] -= removed.astype(np.int64)
+        return self.from_steps(np.clip(repaired, 0, self.max_steps))
+
+    def to_steps(self, x):
+        """Кількість кроків по 0.1 відносно поточних значень."""
+        return np.rint((np.asarray(x, dtype=float) - self.inputs) / STEP).astype(np.int64)
+
+    def from_steps(self, steps):
+        """Значення показників для заданої кількості кроків (округлені, тож однакові кроки дають однакові значення)."""
+        return np.round(self.inputs + STEP * np.asarray(steps), 10)
+
+
+def accepts_problem(fn):
+    """
+    Дозволяє передати QSProblem першим аргументом замість окремих словників.
+
+    Параметри функції з назвами з PROBLEM_FIELDS заповнюються з QSProblem, решта
+    позиційних аргументів прив'язується до інших параметрів у порядку сигнатури.
+    """
+    signature = inspect.signature(fn)
+    positional = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not args or not isinstance(args[0], QSProblem):
+            return fn(*args, **kwargs)
+
+        values = dict(zip(PROBLEM_FIELDS, args[0].unpack()))
+        rest = list(args[1:])
+        bound = {}
+        for name, param in signature.parameters.items():
+            if name in values:
+                bound[name] = values[name]
+            elif rest and param.kind in positional:
+                bound[name] = rest.pop(0)
+        bound.update(kwargs)
+        return fn(**bound)
+
+    return wrapper
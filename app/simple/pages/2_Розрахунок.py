@@ -15,6 +15,8 @@ if app_root not in sys.path:
 
 from top_n_optimizer import run_top_n_lp_optimization
 from genetic_optimizer import compute_total_ru, save_experiment_to_session
+from utils.cache import cached_solve
+from problem import QSProblem
 from lp import optimize_qs_pulp
 
 plt.style.use('seaborn-v0_8')
@@ -57,6 +59,7 @@ QS_MAX = st.session_state["QS_MAX"]
 QS_DELTA = st.session_state["QS_DELTA"]
 QS_COST = st.session_state["QS_COST"]
 MAX_RU = st.session_state["MAX_RU"]
+problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
 
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -65,7 +68,7 @@ with col2:
     eligible_count = sum(1 for k in QS_INPUT.keys() if float(QS_DELTA.get(k, 0.0)) > 0 and float(QS_COST.get(k, 0.0)) != float("inf"))
     st.metric("📊 Показників", eligible_count)
 with col3:
-    current_qs = sum(float(QS_INPUT[k]) * float(QS_WEIGHTS[k]) for k in QS_INPUT.keys())
+    current_qs = problem.current_score
     st.metric("⭐ Поточний бал", f"{current_qs:.2f}")
 
 # Словник з описами показників
@@ -165,7 +168,9 @@ with tab1:
                 selected = [k for k, d in QS_DELTA.items() if float(d) > 0]
                 print(f"📊 Параметри: бюджет={MAX_RU}, обраних показників={len(selected)}")
                 start_time = time.time()
-                x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
+                x_2026, qs_score_lp, df_lp = cached_solve(
+                    optimize_qs_pulp,
+                    algorithm="LP",
                     QS_INPUT=QS_INPUT,
                     QS_WEIGHTS=QS_WEIGHTS,
                     QS_MAX=QS_MAX,
@@ -173,13 +178,10 @@ with tab1:
                     QS_COST=QS_COST,
                     MAX_RU=MAX_RU,
                     selected_indicators=selected,
+                    solver="auto",
                 )
 
-                deltas = {k: float(x_2026[k]) - float(QS_INPUT[k]) for k in QS_INPUT.keys()}
-                ru_used = sum(
-                    (deltas[k] * float(QS_COST[k])) if QS_COST[k] < float("inf") else 0.0
-                    for k in QS_INPUT.keys()
-                )
+                ru_used = float(problem.ru([x_2026[k] for k in problem.keys]))
 
                 # Додаємо розшифровку назв показників
                 df_lp['Показник'] = df_lp['Показник'].apply(lambda x: f"{x} - {indicator_descriptions.get(x, x)}")
@@ -218,6 +220,8 @@ with tab1:
                 
                 with st.expander("📊 Деталі", expanded=True):
                     st.dataframe(df_lp, use_container_width=True)
+                    st.caption(f"Розв'язувач: {df_lp.attrs['backend']} ({df_lp.attrs['solve_time'] * 1000:.1f} мс)"
+                               + (" - результат з кешу, розрахунок не повторювався" if df_lp.attrs.get("from_cache") else ""))
             else:
                 # Топ-N комбінації
                 print(f"🏆 Користувач запустив топ-N LP-оптимізацію: {selected_count} показників з {len(eligible)} доступних")
@@ -302,7 +306,9 @@ with tab2:
         if st.button("🚀 Розрахувати", type="primary", use_container_width=True):
             print(f"🧮 Користувач запустив LP-оптимізацію обраних показників: {selected_keys}")
             start_time = time.time()
-            x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
+            x_2026, qs_score_lp, df_lp = cached_solve(
+                optimize_qs_pulp,
+                algorithm="LP",
                 QS_INPUT=QS_INPUT,
                 QS_WEIGHTS=QS_WEIGHTS,
                 QS_MAX=QS_MAX,
@@ -310,6 +316,7 @@ with tab2:
                 QS_COST=QS_COST,
                 MAX_RU=MAX_RU,
                 selected_indicators=selected_keys,
+                solver="auto",
             )
             
             # Додаємо розшифровку назв показників
@@ -317,11 +324,7 @@ with tab2:
             
             print(f"✅ LP-оптимізація обраних показників завершена, QS Score: {qs_score_lp:.2f}")
 
-            deltas = {k: float(x_2026[k]) - float(QS_INPUT[k]) for k in QS_INPUT.keys()}
-            ru_used = sum(
-                (deltas[k] * float(QS_COST[k])) if QS_COST[k] < float("inf") else 0.0
-                for k in QS_INPUT.keys()
-            )
+            ru_used = float(problem.ru([x_2026[k] for k in problem.keys]))
             
             experiment = save_experiment_to_session(
                 algorithm="LP_Selected",
@@ -354,6 +357,8 @@ with tab2:
 
             with st.expander("📊 Деталі", expanded=True):
                 st.dataframe(df_lp, use_container_width=True)
+                st.caption(f"Розв'язувач: {df_lp.attrs['backend']} ({df_lp.attrs['solve_time'] * 1000:.1f} мс)"
+                           + (" - результат з кешу, розрахунок не повторювався" if df_lp.attrs.get("from_cache") else ""))
 
     st.markdown("---")
     
@@ -3,11 +3,14 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import time
 from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from genetic_optimizer import run_optimization, compute_total_ru, save_experiment_to_session
-from lp import optimize_qs_pulp
+from lp import optimize_qs_pulp, optimize_qs_top_n_pulp
+from utils.cache import get_cache, solution_key
+from utils.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint
 
 # Словник з описами показників
 INDICATOR_DESCRIPTIONS = {
@@ -22,73 +25,119 @@ INDICATOR_DESCRIPTIONS = {
     "SUS": "Sustainability - Сталість розвитку"
 }
 
-def run_top_n_ga_optimization(eligible, num_indicators, num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=False, n_trials=10):
-    """Запускає GA оптимізацію для всіх комбінацій показників"""
+def _run_combo_ga(args):
+    """GA для однієї комбінації показників (функція верхнього рівня для пулу процесів)."""
+    combo, (QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU), options = args
+    all_keys = list(QS_INPUT.keys())
+    frozen_delta = {k: (float(QS_DELTA[k]) if k in combo else 0.0) for k in all_keys}
+
+    if options["auto_find_params"]:
+        ga = run_optimization(
+            QS_INPUT,
+            QS_WEIGHTS,
+            QS_MAX,
+            frozen_delta,
+            QS_COST,
+            MAX_RU,
+            auto_find_params=True,
+            n_trials=options["n_trials"],
+            n_jobs=1,
+            stop_criteria="saturate_10",
+            warm_start=True,
+            time_limit=options["time_per_combo"],
+            telemetry=False,
+            verbose=False
+        )
+    else:
+        ga = run_optimization(
+            QS_INPUT,
+            QS_WEIGHTS,
+            QS_MAX,
+            frozen_delta,
+            QS_COST,
+            MAX_RU,
+            auto_find_params=False,
+            num_generations=options["num_generations"],
+            sol_per_pop=options["sol_per_pop"],
+            num_parents_mating=options["num_parents_mating"],
+            mutation_percent_genes=options["mutation_percent_genes"],
+            stop_criteria="saturate_10",
+            random_seed=42,
+            warm_start=True,
+            time_limit=options["time_per_combo"],
+            telemetry=False,
+            verbose=False
+        )
+
+    solution, qs_score, _ = ga.best_solution()
+    ru = compute_total_ru(QS_INPUT, QS_COST, solution)
+    return {
+        "combo": combo,
+        "qs_score": float(qs_score),
+        "ru": float(ru),
+        "solution": solution,
+        "values": {k: float(solution[i]) for i, k in enumerate(all_keys)},
+        "algorithm": "GA"
+    }
+
+def run_top_n_ga_optimization(eligible, num_indicators, num_generations, sol_per_pop, num_parents_mating, mutation_percent_genes, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, auto_find_params=False, n_trials=10, time_per_combo=None, checkpoint=True):
+    """
+    Запускає GA оптимізацію для всіх комбінацій показників (time_per_combo - ліміт часу на комбінацію, с).
+
+    checkpoint=True зберігає результати вже оброблених комбінацій на диск: перерваний перебір
+    (перезапуск сесії чи контейнера) з тими самими параметрами продовжується з місця зупинки.
+    """
     with st.spinner("Обчислюю найкращі комбінації з GA..."):
         start_time = time.time()
         
         results = []
-        all_keys = list(QS_INPUT.keys())
         
         total_combinations = len(list(combinations(eligible, num_indicators)))
         progress_bar = st.progress(0)
         status_text = st.empty()
-        
-        for i, combo in enumerate(combinations(eligible, num_indicators)):
-            status_text.text(f"Обробляю комбінацію {i+1}/{total_combinations}: {combo}")
-            
-            target_keys = set(combo)
-            frozen_delta = {k: (float(QS_DELTA[k]) if k in target_keys else 0.0) for k in all_keys}
-            
-            if auto_find_params:
-                ga = run_optimization(
-                    QS_INPUT,
-                    QS_WEIGHTS,
-                    QS_MAX,
-                    frozen_delta,
-                    QS_COST,
-                    MAX_RU,
-                    auto_find_params=True,
-                    n_trials=n_trials,
-                    stop_criteria="saturate_10",
-                    verbose=False
-                )
-            else:
-                ga = run_optimization(
-                    QS_INPUT,
-                    QS_WEIGHTS,
-                    QS_MAX,
-                    frozen_delta,
-                    QS_COST,
-                    MAX_RU,
-                    auto_find_params=False,
-                    num_generations=num_generations,
-                    sol_per_pop=sol_per_pop,
-                    num_parents_mating=num_parents_mating,
-                    mutation_percent_genes=mutation_percent_genes,
-                    stop_criteria="saturate_10",
-                    random_seed=42,
-                    verbose=False
-                )
-            
-            solution, qs_score, _ = ga.best_solution()
-            ru = compute_total_ru(QS_INPUT, QS_COST, solution)
-            values = {k: float(solution[i]) for i, k in enumerate(all_keys)}
-            
-            results.append({
-                "combo": combo,
-                "qs_score": float(qs_score),
-                "ru": float(ru),
-                "solution": solution,
-                "values": values,
-                "algorithm": "GA"
-            })
-            
-            progress_bar.progress((i + 1) / total_combinations)
-        
+
+        sweep_key = None
+        if checkpoint:
+            sweep_key = solution_key(
+                QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+                selected_indicators=list(eligible), algorithm="GA_TopN_sweep",
+                num_indicators=num_indicators, num_generations=num_generations, sol_per_pop=sol_per_pop,
+                num_parents_mating=num_parents_mating, mutation_percent_genes=mutation_percent_genes,
+                auto_find_params=auto_find_params, n_trials=n_trials, time_per_combo=time_per_combo,
+            )
+            results = load_checkpoint(sweep_key) or []
+            if results:
+                print(f"♻️ Продовжую топ-N GA з контрольної точки: {len(results)}/{total_combinations} комбінацій")
+        done_combos = {tuple(r["combo"]) for r in results}
+        ga_options = {
+            "num_generations": num_generations, "sol_per_pop": sol_per_pop,
+            "num_parents_mating": num_parents_mating, "mutation_percent_genes": mutation_percent_genes,
+            "auto_find_params": auto_find_params, "n_trials": n_trials, "time_per_combo": time_per_combo,
+        }
+        problem_params = (QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+        pending = [combo for combo in combinations(eligible, num_indicators) if combo not in done_combos]
+
+        # Комбінації незалежні, тож паралелимо по них; автопідбір кожної - в одному процесі
+        with ProcessPoolExecutor(max_workers=max(1, min(os.cpu_count() or 1, len(pending)))) as executor:
+            futures = [executor.submit(_run_combo_ga, (combo, problem_params, ga_options)) for combo in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if sweep_key is not None:
+                    save_checkpoint(sweep_key, results)
+                status_text.text(f"Оброблено комбінацію {len(results)}/{total_combinations}: {result['combo']}")
+                progress_bar.progress(len(results) / total_combinations)
+
+        if sweep_key is not None:
+            clear_checkpoint(sweep_key)
+
+        # Комбінації завершуються в довільному порядку; при рівних QS і RU лишаємо порядок перебору
+        combo_order = {combo: i for i, combo in enumerate(combinations(eligible, num_indicators))}
+        results.sort(key=lambda r: combo_order[tuple(r["combo"])])
         results_df = pd.DataFrame(results).sort_values(
             by=["qs_score", "ru"], 
-            ascending=[False, True]
+            ascending=[False, True],
+            kind="stable"
         ).reset_index(drop=True)
         
         elapsed_time = time.time() - start_time
@@ -126,63 +175,112 @@ def run_top_n_ga_optimization(eligible, num_indicators, num_generations, sol_per
         
         display_top_n_results(results_df, current_qs, MAX_RU, elapsed_time, "GA", QS_INPUT, QS_WEIGHTS)
 
-def run_top_n_lp_optimization(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs):
-    """Запускає LP оптимізацію для всіх комбінацій показників"""
+def _collect_top_n_milp(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, top_k):
+    """Топ-K стратегій одним MILP з обмеженням кількості показників (без перебору комбінацій)"""
+    all_keys = list(QS_INPUT.keys())
+    strategies = optimize_qs_top_n_pulp(
+        QS_INPUT=QS_INPUT,
+        QS_WEIGHTS=QS_WEIGHTS,
+        QS_MAX=QS_MAX,
+        QS_DELTA=QS_DELTA,
+        QS_COST=QS_COST,
+        MAX_RU=MAX_RU,
+        num_indicators=num_indicators,
+        top_k=top_k,
+        selected_indicators=list(eligible),
+    )
+    return [
+        {
+            "combo": s["combo"],
+            "qs_score": s["qs_score"],
+            "ru": s["ru"],
+            "solution": [float(s["x_2026"][k]) for k in all_keys],
+            "values": {k: float(s["x_2026"][k]) for k in all_keys},
+            "algorithm": "LP (MILP)"
+        }
+        for s in strategies
+    ]
+
+def _collect_top_n_enumerate(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, progress_bar, status_text):
+    """Перебирає всі комбінації з num_indicators показників і розв'язує LP для кожної"""
+    results = []
+    all_keys = list(QS_INPUT.keys())
+
+    total_combinations = len(list(combinations(eligible, num_indicators)))
+    for i, combo in enumerate(combinations(eligible, num_indicators)):
+        status_text.text(f"Обробляю комбінацію {i+1}/{total_combinations}: {combo}")
+        
+        try:
+            x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
+                QS_INPUT=QS_INPUT,
+                QS_WEIGHTS=QS_WEIGHTS,
+                QS_MAX=QS_MAX,
+                QS_DELTA=QS_DELTA,
+                QS_COST=QS_COST,
+                MAX_RU=MAX_RU,
+                selected_indicators=list(combo),
+                solver="auto",
+            )
+            
+            ru_used = compute_total_ru(QS_INPUT, QS_COST, [x_2026[k] for k in all_keys])
+            
+            values = {k: float(x_2026[k]) for k in all_keys}
+            
+            results.append({
+                "combo": combo,
+                "qs_score": float(qs_score_lp),
+                "ru": float(ru_used),
+                "solution": [float(x_2026[k]) for k in all_keys],
+                "values": values,
+                "algorithm": "LP"
+            })
+            
+        except Exception as e:
+            st.warning(f"⚠️ Помилка LP для комбінації {combo}: {str(e)}")
+            results.append({
+                "combo": combo,
+                "qs_score": 0.0,
+                "ru": 0.0,
+                "solution": [float(QS_INPUT[k]) for k in all_keys],
+                "values": {k: float(QS_INPUT[k]) for k in all_keys},
+                "algorithm": "LP (помилка)"
+            })
+        
+        progress_bar.progress((i + 1) / total_combinations)
+
+    return results
+
+def run_top_n_lp_optimization(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, current_qs, mode="enumerate", top_k=10):
+    """
+    Запускає LP оптимізацію для топ-N стратегій
+
+    mode="enumerate" - перебір усіх комбінацій з num_indicators показників;
+    mode="milp" - один MILP з обмеженням sum(y) <= num_indicators та top_k різних стратегій.
+    """
     with st.spinner("Обчислюю найкращі комбінації з LP..."):
         start_time = time.time()
         
-        results = []
-        all_keys = list(QS_INPUT.keys())
-        
-        total_combinations = len(list(combinations(eligible, num_indicators)))
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        for i, combo in enumerate(combinations(eligible, num_indicators)):
-            status_text.text(f"Обробляю комбінацію {i+1}/{total_combinations}: {combo}")
-            
-            try:
-                x_2026, qs_score_lp, df_lp = optimize_qs_pulp(
-                    QS_INPUT=QS_INPUT,
-                    QS_WEIGHTS=QS_WEIGHTS,
-                    QS_MAX=QS_MAX,
-                    QS_DELTA=QS_DELTA,
-                    QS_COST=QS_COST,
-                    MAX_RU=MAX_RU,
-                    selected_indicators=list(combo),
-                )
-                
-                deltas = {k: float(x_2026[k]) - float(QS_INPUT[k]) for k in QS_INPUT.keys()}
-                ru_used = sum(
-                    (deltas[k] * float(QS_COST[k])) if QS_COST[k] < float("inf") else 0.0
-                    for k in QS_INPUT.keys()
-                )
-                
-                values = {k: float(x_2026[k]) for k in all_keys}
-                
-                results.append({
-                    "combo": combo,
-                    "qs_score": float(qs_score_lp),
-                    "ru": float(ru_used),
-                    "solution": [float(x_2026[k]) for k in all_keys],
-                    "values": values,
-                    "algorithm": "LP"
-                })
-                
-            except Exception as e:
-                st.warning(f"⚠️ Помилка LP для комбінації {combo}: {str(e)}")
-                results.append({
-                    "combo": combo,
-                    "qs_score": 0.0,
-                    "ru": 0.0,
-                    "solution": [float(QS_INPUT[k]) for k in all_keys],
-                    "values": {k: float(QS_INPUT[k]) for k in all_keys},
-                    "algorithm": "LP (помилка)"
-                })
-            
-            progress_bar.progress((i + 1) / total_combinations)
+        cache = get_cache()
+        cache_key = solution_key(
+            QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+            selected_indicators=list(eligible),
+            algorithm=f"LP_TopN_{mode}",
+            num_indicators=num_indicators,
+            top_k=top_k if mode == "milp" else None
+        )
+        results = cache.get(cache_key)
+        if results is None:
+            if mode == "milp":
+                results = _collect_top_n_milp(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, top_k)
+            else:
+                results = _collect_top_n_enumerate(eligible, num_indicators, QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, progress_bar, status_text)
+            if all(r["algorithm"] != "LP (помилка)" for r in results):
+                cache.set(cache_key, results)
         
-        results_df = pd.DataFrame(results)
+        results_df = pd.DataFrame(results, columns=["combo", "qs_score", "ru", "solution", "values", "algorithm"])
         results_df = results_df[results_df['qs_score'] > 0].sort_values(
             by=["qs_score", "ru"], 
             ascending=[False, True]
@@ -267,7 +365,7 @@ def display_top_n_results(results_df, current_qs, MAX_RU, elapsed_time, algorith
         
         st.markdown("**Топ-3 стратегії**")
         top3_df = results_df.head(3).copy()
-        top3_df['#'] = range(1, 4)
+        top3_df['#'] = range(1, len(top3_df) + 1)
         # Додаємо розшифровку назв показників в списку
         top3_df['Показники'] = top3_df['combo'].apply(
             lambda x: ', '.join([f"{ind} ({INDICATOR_DESCRIPTIONS.get(ind, ind).split(' - ')[0]})" for ind in x])
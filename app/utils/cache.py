@@ -0,0 +1,251 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Каталог дискового кешу; у Docker обидва сервіси монтують сюди спільний том
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "solutions"
+CACHE_DIR = Path(os.environ.get("QS_CACHE_DIR", DEFAULT_CACHE_DIR))
+MEMORY_CACHE_SIZE = int(os.environ.get("QS_CACHE_MEMORY_SIZE", 256))
+# Ліміт дискового кешу в МБ: при перевищенні видаляються файли, які найдовше не читались
+DISK_CACHE_MAX_MB = float(os.environ.get("QS_CACHE_DISK_MAX_MB", 512))
+# Розмір каталогу перевіряється не при кожному записі, а раз на стільки записів
+DISK_CACHE_CHECK_EVERY = 32
+# Версія формату результатів у ключі: збільшується, коли розв'язувач змінює форму того, що
+# повертає, щоб старі записи дискового кешу не підставлялись у новий код
+CACHE_FORMAT_VERSION = 2
+
+
+def _canonical(value):
+    """Приводить значення до стабільного JSON-представлення (int/float однаково, inf як рядок)."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return repr(value)
+    if math.isinf(number) or math.isnan(number):
+        return str(number)
+    return repr(number)
+
+
+def solution_key(
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: Optional[List[str]] = None,
+    algorithm: str = "LP",
+    seed: Optional[int] = None,
+    **extra,
+) -> str:
+    """
+    Канонічний SHA-256 ключ набору параметрів.
+
+    Ключ не залежить від порядку словників, типу чисел (50 і 50.0) чи порядку
+    обраних показників; додаткові параметри алгоритму передаються через extra.
+    """
+    payload = {
+        "QS_INPUT": _canonical(QS_INPUT),
+        "QS_WEIGHTS": _canonical(QS_WEIGHTS),
+        "QS_MAX": _canonical(QS_MAX),
+        "QS_DELTA": _canonical(QS_DELTA),
+        "QS_COST": _canonical(QS_COST),
+        "MAX_RU": _canonical(MAX_RU),
+        "selected_indicators": sorted(selected_indicators) if selected_indicators is not None else None,
+        "algorithm": algorithm,
+        "seed": seed,
+        "extra": _canonical(extra),
+        "version": CACHE_FORMAT_VERSION,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SolutionCache:
+    """
+    Дворівневий кеш розв'язків: LRU у пам'яті процесу та pickle-файли на диску.
+
+    Дисковий рівень переживає перезапуск контейнера і спільний для Full та Simple
+    версій, якщо вони дивляться в один каталог; його розмір обмежений max_disk_mb
+    (читання оновлює час зміни файлу, тож першими видаляються давно не потрібні).
+    Значення копіюються при читанні та записі, тож сторінки можуть змінювати
+    отримані DataFrame.
+    """
+
+    def __init__(self, cache_dir: Path | str | None = CACHE_DIR, max_memory_items: int = MEMORY_CACHE_SIZE,
+                 max_disk_mb: float | None = DISK_CACHE_MAX_MB):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_memory_items = max_memory_items
+        self.max_disk_mb = max_disk_mb
+        self._writes = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def _remember(self, key: str, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key])
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                value = None
+            if value is not None:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value)
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Атомарний запис: інший сервіс ніколи не прочитає напівзаписаний файл
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Не вдалося записати кеш на диск: {e}")
+                return
+
+            with self._lock:
+                self._writes += 1
+                check = self._writes % DISK_CACHE_CHECK_EVERY == 1
+            if check:
+                self.prune_disk()
+
+    def prune_disk(self):
+        """Видаляє найдавніше використані файли, доки дисковий кеш не стане меншим за 90% ліміту."""
+        if self.cache_dir is None or self.max_disk_mb is None:
+            return
+        entries = []
+        for path in self.cache_dir.glob("*/*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_disk_mb * 1024 * 1024
+        if total <= limit:
+            return
+        for _, size, path in sorted(entries):
+            if total <= 0.9 * limit:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+_default_cache: SolutionCache | None = None
+
+
+def get_cache() -> SolutionCache:
+    """Спільний для всіх сесій процесу екземпляр кешу."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SolutionCache()
+    return _default_cache
+
+
+def _mark_cached(result):
+    for item in (result if isinstance(result, tuple) else (result,)):
+        if isinstance(item, pd.DataFrame):
+            item.attrs["from_cache"] = True
+        elif hasattr(item, "from_cache"):
+            item.from_cache = True
+
+
+def cached_solve(
+    solve_fn: Callable,
+    *,
+    QS_INPUT: Dict[str, float],
+    QS_WEIGHTS: Dict[str, float],
+    QS_MAX: Dict[str, float],
+    QS_DELTA: Dict[str, float],
+    QS_COST: Dict[str, float],
+    MAX_RU: float,
+    selected_indicators: Optional[List[str]] = None,
+    algorithm: str = "LP",
+    seed: Optional[int] = None,
+    **kwargs,
+):
+    """
+    Викликає solve_fn з тими самими іменованими параметрами, якщо результату ще немає в кеші.
+
+    Усі kwargs передаються в solve_fn і входять до ключа. Результат з кешу позначається:
+    DataFrame у ньому отримують attrs["from_cache"] = True, об'єкти з атрибутом
+    from_cache (наприклад, GAResult) - from_cache = True.
+    """
+    key = solution_key(
+        QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU,
+        selected_indicators, algorithm, seed, **kwargs
+    )
+    cache = get_cache()
+    result = cache.get(key)
+    if result is not None:
+        _mark_cached(result)
+    else:
+        result = solve_fn(
+            QS_INPUT=QS_INPUT,
+            QS_WEIGHTS=QS_WEIGHTS,
+            QS_MAX=QS_MAX,
+            QS_DELTA=QS_DELTA,
+            QS_COST=QS_COST,
+            MAX_RU=MAX_RU,
+            selected_indicators=selected_indicators,
+            **kwargs,
+        )
+        cache.set(key, result)
+    return result
@@ -0,0 +1,66 @@
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Контрольні точки довгих запусків GA, автопідбору та топ-N; у Docker лежать на спільному томі .cache
+DEFAULT_CHECKPOINT_DIR = Path(__file__).resolve().parents[2] / ".cache" / "checkpoints"
+CHECKPOINT_DIR = Path(os.environ.get("QS_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR))
+# Контрольні точки, не оновлені довше, вважаються покинутими (перерваний запуск так і не повторили)
+CHECKPOINT_MAX_AGE_DAYS = float(os.environ.get("QS_CHECKPOINT_MAX_AGE_DAYS", 7))
+_pruned = False
+
+
+def checkpoint_path(key: str, suffix: str = ".pkl") -> Path:
+    """Шлях файлу контрольної точки для ключа (наприклад, solution_key параметрів запуску)."""
+    return CHECKPOINT_DIR / f"{key}{suffix}"
+
+
+def prune_checkpoints(max_age_days: float | None = CHECKPOINT_MAX_AGE_DAYS):
+    """Видаляє контрольні точки (і недописані .tmp), не оновлені довше за max_age_days днів."""
+    if max_age_days is None or not CHECKPOINT_DIR.is_dir():
+        return
+    cutoff = time.time() - max_age_days * 24 * 3600
+    for path in CHECKPOINT_DIR.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def save_checkpoint(key: str, state: Any):
+    """Атомарно зберігає стан: перерваний запис не зіпсує попередню контрольну точку."""
+    global _pruned
+    if not _pruned:
+        # Покинуті контрольні точки прибираються один раз за процес, при першому записі
+        _pruned = True
+        prune_checkpoints()
+    path = checkpoint_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Не вдалося зберегти контрольну точку: {e}")
+
+
+def load_checkpoint(key: str) -> Optional[Any]:
+    """Останній збережений стан або None, якщо контрольної точки немає чи вона пошкоджена."""
+    try:
+        with open(checkpoint_path(key), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def clear_checkpoint(key: str, suffix: str = ".pkl"):
+    """Видаляє контрольну точку після успішного завершення запуску."""
+    try:
+        checkpoint_path(key, suffix).unlink()
+    except OSError:
+        pass
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from problem import STEP, QSProblem, accepts_problem
+
+# Файл з підібраними параметрами GA; лежить поруч із кешем розв'язків, тож у Docker потрапляє на спільний том
+DEFAULT_HYPERPARAMS_PATH = Path(__file__).resolve().parents[2] / ".cache" / "hyperparams.json"
+HYPERPARAMS_PATH = Path(os.environ.get("QS_HYPERPARAMS_PATH", DEFAULT_HYPERPARAMS_PATH))
+# Скільки днів збережені параметри вважаються свіжими; старші лише стартова точка для Optuna
+HYPERPARAMS_MAX_AGE_DAYS = float(os.environ.get("QS_HYPERPARAMS_MAX_AGE_DAYS", 30))
+
+
+@accepts_problem
+def problem_signature(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU, tightness_step: float = 0.05, **extra) -> str:
+    """
+    Структурний підпис задачі для пам'яті гіперпараметрів.
+
+    Враховує кількість вільних генів, відсортовані кількості кроків 0.1 та напруженість
+    бюджету (MAX_RU / вартість усіх кроків, округлена до tightness_step), але не самі
+    значення показників, тож близькі сценарії мають однаковий підпис. extra (режим
+    кодування тощо) додається до підпису як є.
+    """
+    problem = QSProblem.from_dicts(QS_INPUT, QS_WEIGHTS, QS_MAX, QS_DELTA, QS_COST, MAX_RU)
+    free = ~problem.frozen
+    full_cost = float(np.sum(problem.max_steps * STEP * problem.finite_costs))
+    tightness = 1.0 if full_cost == 0 else min(1.0, problem.max_ru / full_cost)
+    tightness = round(round(tightness / tightness_step) * tightness_step, 4)
+
+    parts = [
+        f"genes={int(free.sum())}",
+        "steps=" + ",".join(str(int(s)) for s in sorted(problem.max_steps[free])),
+        f"tightness={tightness}",
+    ]
+    parts += [f"{name}={extra[name]}" for name in sorted(extra)]
+    return "|".join(parts)
+
+
+class HyperparamMemory:
+    """
+    Збережені на диску параметри GA, знайдені Optuna, за підписом задачі.
+
+    Записи - JSON-словник {підпис: {"params", "updated"}}; запис атомарний,
+    при одночасному записі з двох процесів виграє останній.
+    """
+
+    def __init__(self, path: Path | str | None = HYPERPARAMS_PATH):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, signature: str) -> Optional[Dict[str, Any]]:
+        """Запис для підпису з додатковим полем age_days або None."""
+        with self._lock:
+            entry = self._load().get(signature)
+        if entry is None:
+            return None
+        try:
+            age = datetime.now() - datetime.fromisoformat(entry["updated"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return dict(entry, age_days=age.total_seconds() / 86400)
+
+    def store(self, signature: str, params: Dict[str, Any]):
+        if self.path is None:
+            return
+        with self._lock:
+            entries = self._load()
+            entries[signature] = {
+                "params": params,
+                "updated": datetime.now().isoformat(timespec="seconds"),
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ Не вдалося зберегти параметри GA: {e}")
+
+
+_default_memory: HyperparamMemory | None = None
+
+
+def get_hyperparam_memory() -> HyperparamMemory:
+    """Спільний для процесу екземпляр пам'яті гіперпараметрів."""
+    global _default_memory
+    if _default_memory is None:
+        _default_memory = HyperparamMemory()
+    return _default_memory